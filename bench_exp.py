@@ -0,0 +1,715 @@
+#! /usr/bin/env python
+"""Overview:
+    bench_exp.py : micro benchmarks of exp.py
+Usage:
+    bench_exp.py [<benchmark>...]
+
+    bench_exp.py -h | --help
+
+Options:
+    -h --help                Show this screen and exit.
+
+If no benchmark is specified, all the benchmarks are run.
+"""
+from __future__ import annotations
+
+import contextlib
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Mapping
+
+import exp
+from modules.lower_layer_modules.FileSideEffects import PathResolution, read_json, relative_path2absolute, \
+    relative_paths2absolute, write_json
+from modules.lower_layer_modules.FrozenJSON import freeze_json
+from modules.lower_layer_modules.JSONCache import JSONFileCache
+from modules.lower_layer_modules.Launchers import LaunchMode, RecordingLauncher, Spawner, launch
+from modules.lower_layer_modules.MountTable import DrvfsMountTable
+from modules.lower_layer_modules.WSLEnvironment import WSLEnvironment
+
+
+def sample_wsl2_paths(number: int) -> tuple[Path, ...]:
+    """
+    WSL2 paths looking like build artifacts spread on a few drives.
+    Args:
+        number(int): the number of the paths
+
+    Returns:
+        wsl2 paths(tuple[pathlib.Path, ...])
+    """
+    return tuple(Path("/mnt") / "cdz"[index % 3] / "work" / f"job{index % 17}" / "artifacts" / f"file{index}.log"
+                 for index in range(number))
+
+
+def report(name: str, number: int, seconds: float) -> None:
+    """
+    print a benchmark result line.
+    Args:
+        name(str): the name of the measured procedure
+        number(int): the number of the processed items
+        seconds(float): the elapsed time
+    """
+    print(f"{name:<40} {number / seconds:>14,.0f} items/s ({seconds * 1e3:.1f} ms for {number} items)")
+
+
+def best_of(procedure: Callable[[], object], repeat: int = 5) -> float:
+    """
+    the best elapsed time of repeated runs.
+    Args:
+        procedure(Callable[[], object]): the measured procedure
+        repeat(int, optional): the number of runs (default: 5)
+
+    Returns:
+        elapsed time in seconds(float)
+    """
+    return min(timeit.repeat(procedure, number=1, repeat=repeat))
+
+
+def bench_batch_conversion(number: int = 50_000) -> None:
+    """
+    per-call wsl2_full_path2windows_path vs. the batch wsl2_paths2windows_paths.
+    """
+    paths: tuple[Path, ...] = sample_wsl2_paths(number)
+    report("wsl2_full_path2windows_path (per call)", number,
+           best_of(lambda: [exp.wsl2_full_path2windows_path(path) for path in paths]))
+    report("wsl2_paths2windows_paths (batch)", number,
+           best_of(lambda: exp.wsl2_paths2windows_paths(paths)))
+
+
+def bench_string_conversion(number: int = 50_000) -> None:
+    """
+    str(wsl2_full_path2windows_path(Path(p))) vs. the string fast path wsl2_path2windows_str,
+    for the /mnt/<drive> branch and the \\\\wsl$ branch.
+    """
+    drive_paths: tuple[str, ...] = tuple(path.as_posix() for path in sample_wsl2_paths(number))
+    linux_paths: tuple[str, ...] = tuple(path.replace("/mnt/", "/home/", 1) for path in drive_paths)
+    report("str(wsl2_full_path2windows_path)", number,
+           best_of(lambda: [str(exp.wsl2_full_path2windows_path(Path(path))) for path in drive_paths]))
+    report("wsl2_path2windows_str (/mnt)", number,
+           best_of(lambda: [exp.wsl2_path2windows_str(path) for path in drive_paths]))
+    report("str(wsl2_path2unc_path)", number,
+           best_of(lambda: [str(exp.wsl2_path2unc_path(Path(path))) for path in linux_paths]))
+    report("wsl2_path2windows_str (\\\\wsl$)", number,
+           best_of(lambda: [exp.wsl2_path2windows_str(path) for path in linux_paths]))
+
+
+def bench_cached_conversion(number: int = 50_000, distinct: int = 300) -> None:
+    """
+    wsl2_full_path2windows_path vs. its memoized variant on a few hundred repeated directories.
+    """
+    directories: tuple[Path, ...] = sample_wsl2_paths(distinct)
+    paths: tuple[Path, ...] = tuple(directories[index % distinct] for index in range(number))
+    exp.cached_wsl2_full_path2windows_path.cache_clear()
+    report("wsl2_full_path2windows_path", number,
+           best_of(lambda: [exp.wsl2_full_path2windows_path(path) for path in paths]))
+    report("cached_wsl2_full_path2windows_path", number,
+           best_of(lambda: [exp.cached_wsl2_full_path2windows_path(path) for path in paths]))
+    print(exp.cached_wsl2_full_path2windows_path.cache_info())
+
+
+def bench_reverse_conversion(number: int = 50_000, spawns: int = 200) -> None:
+    """
+    windows_path2wsl2_path vs. spawning wslpath per path.
+    Where wslpath is not installed, spawning /bin/true stands in for the process spawn cost.
+    """
+    windows_paths: tuple[str, ...] = tuple(str(exp.wsl2_full_path2windows_path(path))
+                                           for path in sample_wsl2_paths(number))
+    report("windows_path2wsl2_path", number,
+           best_of(lambda: [exp.windows_path2wsl2_path(path) for path in windows_paths]))
+    report("iter_windows_paths2wsl2_paths", number,
+           best_of(lambda: list(exp.iter_windows_paths2wsl2_paths(windows_paths))))
+    wslpath: str | None = shutil.which("wslpath")
+    command: list[str] = [wslpath, "-u"] if wslpath is not None else [shutil.which("true") or "/bin/true"]
+    name: str = "wslpath -u (per path)" if wslpath is not None else "spawn of /bin/true (stand-in for wslpath)"
+    report(name, spawns,
+           best_of(lambda: [subprocess.run(command + ([path] if wslpath is not None else []),
+                                           stdout=subprocess.PIPE, check=False)
+                            for path in windows_paths[:spawns]], repeat=1))
+
+
+def bench_mount_table_lookup(number: int = 50_000) -> None:
+    """
+    the longest-prefix lookup of a drvfs mount table vs. the /mnt/<drive> string conversion.
+    """
+    drive_paths: tuple[str, ...] = tuple(path.as_posix() for path in sample_wsl2_paths(number))
+    with tempfile.TemporaryDirectory() as directory:
+        mountinfo: Path = Path(directory) / "mountinfo"
+        mountinfo.write_text("".join(f"{86 + index} 63 0:{60 + index} / /mnt/{drive} rw,noatime - 9p {drive.upper()}:\\134 "
+                                     f"rw,aname=drvfs;path={drive.upper()}:\\;uid=1000,trans=virtio\n"
+                                     for index, drive in enumerate("cdz")))
+        mount_table: DrvfsMountTable = DrvfsMountTable(mountinfo)
+    report("wsl2_path2windows_str", number,
+           best_of(lambda: [exp.wsl2_path2windows_str(path) for path in drive_paths]))
+    report("wsl2_path2native_windows_str", number,
+           best_of(lambda: [exp.wsl2_path2native_windows_str(path, mount_table=mount_table) for path in drive_paths]))
+
+
+def resident_set_size_mb() -> float:
+    """
+    the resident set size of this process.
+    Returns:
+        RSS in MiB(float)
+    """
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def bench_spawn_latency(heap_sizes_mb: tuple[int, ...] = (0, 512, 2048), spawns: int = 50) -> None:
+    """
+    spawn latency of /bin/true against the parent RSS, for the subprocess and posix_spawn spawners.
+    """
+    true_command: list[str] = [shutil.which("true") or "/bin/true"]
+    for heap_size_mb in heap_sizes_mb:
+        ballast: bytearray = bytearray(heap_size_mb << 20)
+        ballast[::4096] = b"\x01" * len(range(0, len(ballast), 4096))
+        for spawner in Spawner:
+            latencies: list[float] = timeit.repeat(lambda: launch(true_command, LaunchMode.WAIT, spawner),
+                                                   number=1, repeat=spawns)
+            print(f"RSS {resident_set_size_mb():>7.0f} MiB  {spawner.value:<12} "
+                  f"median {statistics.median(latencies) * 1e3:6.2f} ms  min {min(latencies) * 1e3:6.2f} ms")
+        del ballast
+
+
+def latency_percentiles(latencies: list[float]) -> dict[str, float]:
+    """
+    the 50th, 95th and 99th percentiles of latencies.
+    Args:
+        latencies(list[float]): latencies in seconds
+
+    Returns:
+        the percentiles in milliseconds keyed by "p50", "p95" and "p99" (dict[str, float])
+    """
+    percentiles: list[float] = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": percentiles[49] * 1e3, "p95": percentiles[94] * 1e3, "p99": percentiles[98] * 1e3}
+
+
+def report_latencies(name: str, latencies: list[float]) -> None:
+    """
+    print the median, the 95th and the 99th percentiles of latencies.
+    Args:
+        name(str): the name of the measured procedure
+        latencies(list[float]): latencies in seconds
+    """
+    percentiles: dict[str, float] = latency_percentiles(latencies)
+    print(f"{name:<40} median {percentiles['p50']:7.2f} ms  p95 {percentiles['p95']:7.2f} ms"
+          f"  p99 {percentiles['p99']:7.2f} ms")
+
+
+def stand_in_environment(directory: Path) -> dict[str, str]:
+    """
+    the environment variables under which exp.py finds a stand-in explorer.exe doing nothing,
+    with its caches and sockets in the directory.
+    Args:
+        directory(pathlib.Path): a temporary directory
+
+    Returns:
+        environment variables(dict[str, str])
+    """
+    explorer: Path = directory / "bin" / "explorer.exe"
+    explorer.parent.mkdir(parents=True, exist_ok=True)
+    explorer.write_text("#!/bin/sh\nexit 0\n")
+    explorer.chmod(0o755)
+    environment: dict[str, str] = {name: value for name, value in os.environ.items() if name != "WINDIR"}
+    environment.update(PATH=f"{explorer.parent}{os.pathsep}{os.environ.get('PATH', '')}",
+                       XDG_CACHE_HOME=str(directory / "cache"), XDG_RUNTIME_DIR=str(directory / "run"))
+    return environment
+
+
+def bench_daemon_latency(runs: int = 30) -> None:
+    """
+    end-to-end latency of the cold exp.py CLI vs. expc.py forwarding to a running expd.py, with a stand-in explorer.
+    """
+    script_directory: Path = Path(__file__).resolve().parent
+    with tempfile.TemporaryDirectory() as directory:
+        environment: dict[str, str] = stand_in_environment(Path(directory))
+
+        def latencies(command: list[str]) -> list[float]:
+            return timeit.repeat(lambda: subprocess.run(command, env=environment, check=True),
+                                 number=1, repeat=runs)
+
+        report_latencies("cold CLI: exp.py", latencies([sys.executable, str(script_directory / "exp.py"), "/tmp"]))
+        daemon: subprocess.Popen = subprocess.Popen([sys.executable, str(script_directory / "expd.py")],
+                                                    env=environment)
+        try:
+            socket: Path = Path(directory) / "run" / "exp" / "exp.sock"
+            while not socket.exists():
+                time.sleep(0.01)
+            client: list[str] = [str(script_directory / "expc.py"), "/tmp"]
+            report_latencies("daemon: expc.py", latencies([sys.executable, *client]))
+            report_latencies("daemon: python -S expc.py", latencies([sys.executable, "-S", *client]))
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+@contextlib.contextmanager
+def counted_filesystem_calls(round_trip_ms: float = 0.0) -> Iterator[list[int]]:
+    """
+    count the calls of os.stat, os.lstat and os.scandir, each optionally delayed by a sleep standing in for
+    the 9P round trip of drvfs (/mnt/c).
+    Args:
+        round_trip_ms(float, optional): the delay of each call in milliseconds (default: 0.0)
+
+    Returns:
+        the context of a list whose only element is the number of calls (Iterator[list[int]])
+    """
+    calls: list[int] = [0]
+    originals: dict[str, Callable] = {name: getattr(os, name) for name in ("stat", "lstat", "scandir")}
+
+    def counted(function: Callable) -> Callable:
+        def call(*args, **kwargs):
+            calls[0] += 1
+            if round_trip_ms:
+                time.sleep(round_trip_ms / 1e3)
+            return function(*args, **kwargs)
+        return call
+
+    for name, function in originals.items():
+        setattr(os, name, counted(function))
+    try:
+        yield calls
+    finally:
+        for name, function in originals.items():
+            setattr(os, name, function)
+
+
+def report_filesystem_calls(name: str, resolve_all: Callable[[int], object], number: int,
+                            round_trip_ms: float) -> None:
+    """
+    print the throughput, the filesystem calls per path, and the throughput with a simulated drvfs round trip.
+    Args:
+        name(str): the name of the measured procedure
+        resolve_all(Callable[[int], object]): the procedure resolving the given number of paths
+        number(int): the number of the paths
+        round_trip_ms(float): the simulated round trip of a filesystem call in milliseconds
+    """
+    report(name, number, best_of(lambda: resolve_all(number)))
+    with counted_filesystem_calls() as calls:
+        resolve_all(number)
+    print(f"{'':<40} {calls[0] / number:>14.2f} filesystem calls per path")
+    with counted_filesystem_calls(round_trip_ms):
+        report(f"{name}, {round_trip_ms} ms per call", number // 10,
+               best_of(lambda: resolve_all(number // 10), repeat=1))
+
+
+def bench_path_resolution(depth: int = 24, number: int = 2_000, round_trip_ms: float = 0.2) -> None:
+    """
+    relative_path2absolute of relative paths under a deep directory in each PathResolution mode.
+    A temporary directory stands in for a drvfs mount (and is given as a link-free prefix for the links mode).
+    The filesystem calls are counted, and measured again with a sleep of round_trip_ms in each of them
+    standing in for the 9P round trip of a stat on /mnt/c.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        mount: Path = Path(directory) / "mnt" / "c"
+        deep: Path = mount.joinpath(*(f"level{index}" for index in range(depth)))
+        deep.mkdir(parents=True)
+        arguments: tuple[Path, ...] = tuple(Path(f"../level{depth - 1}/./file{index}.log") for index in range(number))
+        for resolution in PathResolution:
+            report_filesystem_calls(
+                f"relative_path2absolute ({resolution.value})",
+                lambda count: [relative_path2absolute(argument, deep, resolution=resolution,
+                                                      link_free_prefixes=(str(mount),))
+                               for argument in arguments[:count]],
+                number, round_trip_ms)
+
+
+def bench_batch_path_resolution(directories: int = 20, number: int = 10_000, round_trip_ms: float = 0.2) -> None:
+    """
+    relative_path2absolute per path vs. the batch relative_paths2absolute sharing the resolved directories,
+    on paths spread in a few directories of a working tree.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        tree: Path = Path(directory) / "work" / "tree"
+        for index in range(directories):
+            (tree / "src" / f"package{index}").mkdir(parents=True)
+        arguments: tuple[Path, ...] = tuple(Path(f"src/package{index % directories}/module{index}.py")
+                                            for index in range(number))
+        report_filesystem_calls(
+            "relative_path2absolute (per path)",
+            lambda count: [relative_path2absolute(argument, tree) for argument in arguments[:count]],
+            number, round_trip_ms)
+        report_filesystem_calls(
+            "relative_paths2absolute (batch)",
+            lambda count: relative_paths2absolute(arguments[:count], tree),
+            number, round_trip_ms)
+
+
+def bench_stream_conversion(numbers: tuple[int, ...] = (1_000_000, 10_000_000), block: int = 10_000) -> None:
+    """
+    throughput and peak RSS of exp.py --convert -0 on synthetic NUL-separated inputs of numbers paths,
+    generated block by block into its standard input and written to /dev/null.
+    """
+    script: Path = Path(__file__).resolve().parent / "exp.py"
+    paths: bytes = b"".join(path.as_posix().encode() + b"\0" for path in sample_wsl2_paths(block))
+    for number in numbers:
+        with tempfile.TemporaryDirectory() as directory:
+            def feed(stdin: BinaryIO) -> None:
+                for _ in range(number // block):
+                    stdin.write(paths)
+
+            seconds, peak, _ = measured_python(SCRIPT_DRIVER, str(script), "--convert", "-0", feed=feed,
+                                               environment=stand_in_environment(Path(directory)), capture=False)
+            report(f"exp.py --convert -0 ({number:,} paths)", number, seconds)
+            print(f"{'':<40} {peak:>14.1f} MiB peak RSS")
+
+
+def bench_launch_pipeline(number: int = 5_000, directories: int = 20) -> None:
+    """
+    the CLI pipeline (resolve -> convert -> launch) through run_cli with the in-process RecordingLauncher,
+    one path per invocation and all the paths in one invocation, with each --resolution.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        tree: Path = Path(directory)
+        for index in range(directories):
+            (tree / f"package{index}").mkdir()
+        arguments: list[str] = [f"package{index % directories}/module{index}.py" for index in range(number)]
+        environment: WSLEnvironment = WSLEnvironment(distribution="Ubuntu-20.04", explorer=Path("explorer.exe"),
+                                                     unc_host="wsl$")
+        for resolution in exp.PathResolution:
+            options: list[str] = ["--resolution", resolution.value]
+            launcher: RecordingLauncher = RecordingLauncher()
+            report(f"run_cli per path ({resolution.value})", number,
+                   best_of(lambda: [exp.run_cli([*options, argument], tree, environment, launcher=launcher)
+                                    for argument in arguments], repeat=3))
+            report(f"run_cli of all paths ({resolution.value})", number,
+                   best_of(lambda: exp.run_cli([*options, *arguments], tree, environment, launcher=launcher),
+                           repeat=3))
+
+
+def write_sample_json_records(json_file: Path, number: int) -> int:
+    """
+    write a JSON document {"meta": {...}, "items": [...]} of number homogeneous records, record by record.
+    Args:
+        json_file(pathlib.Path): the JSON file
+        number(int): the number of the records
+
+    Returns:
+        the file size in bytes(int)
+    """
+    paths: tuple[Path, ...] = sample_wsl2_paths(1000)
+    with open(json_file, "w", encoding="utf-8") as f:
+        f.write('{"meta": {"version": 3, "generator": "bench_exp.py"}, "items": [')
+        for index in range(number):
+            f.write(("," if index else "") + json.dumps(
+                {"id": index, "path": paths[index % 1000].as_posix(), "size": index * 37 % 65536,
+                 "mtime_ns": 1_600_000_000_000_000_000 + index, "tags": ["build", f"job{index % 17}"],
+                 "owner": {"name": "builder", "uid": 1000}}))
+        f.write("]}")
+    return json_file.stat().st_size
+
+
+# Prepended to the code run by measured_python: at exit, the measured interpreter writes its own peak RSS (VmHWM in
+# kB) to the file named by BENCH_PEAK_RSS_FILE. ru_maxrss of a child is not usable, because a forked and exec'd child
+# inherits the RSS high-water mark of this process (e.g. the 2 GiB ballast of spawn_latency), but VmHWM is per address
+# space and starts from zero at exec.
+PEAK_RSS_REPORTER: str = """\
+import atexit as _atexit, os as _os
+
+
+def _report_peak_rss():
+    with open("/proc/self/status") as _status, open(_os.environ["BENCH_PEAK_RSS_FILE"], "w") as _peak:
+        _peak.write(next(_line.split()[1] for _line in _status if _line.startswith("VmHWM:")))
+
+
+_atexit.register(_report_peak_rss)
+"""
+
+# Run by measured_python: runs a script (sys.argv[1]) as __main__ with the following arguments.
+SCRIPT_DRIVER: str = """\
+import runpy, sys
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def measured_python(code: str, *arguments: str, feed: Callable[[BinaryIO], None] | None = None,
+                    environment: Mapping[str, str] | None = None, capture: bool = True) -> tuple[float, float, str]:
+    """
+    run python code in a fresh interpreter with the repository on sys.path, and measure the peak RSS of that
+    interpreter alone (VmHWM reported by PEAK_RSS_REPORTER).
+    Args:
+        code(str): the code run by python -c
+        arguments(str): sys.argv[1:] of the code
+        feed(Callable[[BinaryIO], None] | None, optional): writes the standard input (default: None, no input)
+        environment(Mapping[str, str] | None, optional): environment variables (default: None, os.environ)
+        capture(bool, optional): return the standard output, otherwise discard it (default: True)
+
+    Returns:
+        the elapsed seconds, the peak RSS in MiB and the standard output (tuple[float, float, str])
+    """
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "wb") as devnull:
+        peak_file: Path = Path(directory) / "peak_rss"
+        started: float = time.perf_counter()
+        process: subprocess.Popen = subprocess.Popen(
+            [sys.executable, "-c", PEAK_RSS_REPORTER + code, *arguments],
+            stdin=subprocess.PIPE if feed else subprocess.DEVNULL, stdout=subprocess.PIPE if capture else devnull,
+            cwd=Path(__file__).resolve().parent,
+            env={**(os.environ if environment is None else environment), "BENCH_PEAK_RSS_FILE": str(peak_file)})
+        if feed:
+            feed(process.stdin)
+            process.stdin.close()
+        output: bytes = process.stdout.read() if capture else b""
+        if process.wait():
+            raise subprocess.CalledProcessError(process.returncode, code)
+        return time.perf_counter() - started, int(peak_file.read_text()) / 1024, output.decode().strip()
+
+
+def bench_json_stream(number: int = 1_000_000) -> None:
+    """
+    time and peak RSS of read_json (the whole document at once) vs. the chunked iter_json_items
+    on a synthetic file of number records.
+    """
+    readers: dict[str, str] = {
+        "read_json": "len(read_json(Path(sys.argv[1]))['items'])",
+        "iter_json_items items[*]": "sum(1 for _ in iter_json_items(Path(sys.argv[1]), 'items[*]'))",
+        "iter_json_items items[*].id": "sum(1 for _ in iter_json_items(Path(sys.argv[1]), 'items[*].id'))",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        json_file: Path = Path(directory) / "records.json"
+        size: int = write_sample_json_records(json_file, number)
+        print(f"{number:,} records, {size / 2 ** 20:.1f} MiB")
+        for name, expression in readers.items():
+            seconds, peak, output = measured_python(
+                "import sys\nfrom pathlib import Path\n"
+                "from modules.lower_layer_modules.FileSideEffects import iter_json_items, read_json\n"
+                f"print({expression})", str(json_file))
+            assert int(output) == number
+            report(name, number, seconds)
+            print(f"{'':<40} {peak:>14.1f} MiB peak RSS")
+
+
+def bench_json_cache(records: int = 300, number: int = 2_000) -> None:
+    """
+    repeated reads of a manifest-sized JSON file: read_json every time vs. the process-wide JSONFileCache,
+    and the cost of a miss (reading, deep freezing and weighing).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        json_file: Path = Path(directory) / "manifest.json"
+        size: int = write_sample_json_records(json_file, records)
+        print(f"{records:,} records, {size / 2 ** 10:.1f} KiB")
+        report("read_json", number, best_of(lambda: [read_json(json_file) for _ in range(number)], repeat=3))
+        cache: JSONFileCache = JSONFileCache()
+        report("JSONFileCache.read (hits)", number,
+               best_of(lambda: [cache.read(json_file) for _ in range(number)], repeat=3))
+        misses: int = number // 20
+
+        def read_missing() -> None:
+            for _ in range(misses):
+                cache.invalidate()
+                cache.read(json_file)
+
+        report("JSONFileCache.read (misses)", misses, best_of(read_missing, repeat=3))
+        info = cache.cache_info()
+        print(f"{'':<40} {info.current_weight / 2 ** 10:>14.1f} KiB estimated in the cache")
+
+
+def bench_json_frozen(records: int = 3_000, consumers: int = 8, number: int = 20) -> None:
+    """
+    one read of a JSON file handed to consumers that must not see each other's changes: a copy.deepcopy
+    of read_json per consumer vs. deep freezing once (after json.loads or while parsing) and sharing the result.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        json_file: Path = Path(directory) / "records.json"
+        size: int = write_sample_json_records(json_file, records)
+        print(f"{records:,} records, {size / 2 ** 10:.1f} KiB, {consumers} consumers")
+
+        def copied() -> None:
+            json_dict = read_json(json_file)
+            [copy.deepcopy(dict(json_dict)) for _ in range(consumers)]
+
+        def shared(read: Callable[[], object]) -> Callable[[], None]:
+            def procedure() -> None:
+                for _ in range(number):
+                    json_dict = read()
+                    [json_dict for _ in range(consumers)]
+
+            return procedure
+
+        report("read_json + deepcopy per consumer", number,
+               best_of(lambda: [copied() for _ in range(number)], repeat=3))
+        report("read_json + freeze_json, shared", number,
+               best_of(shared(lambda: freeze_json(read_json(json_file))), repeat=3))
+        report("read_json(frozen=True), shared", number,
+               best_of(shared(lambda: read_json(json_file, frozen=True)), repeat=3))
+        report("read_json (no isolation)", number,
+               best_of(lambda: [read_json(json_file) for _ in range(number)], repeat=3))
+
+
+def bench_json_compact(number: int = 1_000_000) -> None:
+    """
+    time and peak RSS of read_json with plain dicts vs. deep frozen objects vs. compact records sharing their key
+    tuples, on a synthetic file of number records, and the speed of reading a member of every record.
+    """
+    readers: dict[str, str] = {
+        "read_json (dict)": "",
+        "read_json(frozen=True)": "frozen=True",
+        "read_json(compact=True)": "compact=True",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        json_file: Path = Path(directory) / "records.json"
+        size: int = write_sample_json_records(json_file, number)
+        print(f"{number:,} records, {size / 2 ** 20:.1f} MiB")
+        for name, options in readers.items():
+            seconds, peak, output = measured_python(
+                "import sys, time\nfrom pathlib import Path\n"
+                "from modules.lower_layer_modules.FileSideEffects import read_json\n"
+                f"items = read_json(Path(sys.argv[1]), {options})['items']\n"
+                "started = time.perf_counter()\n"
+                "assert sum(item['size'] for item in items) >= 0\n"
+                "print(len(items), time.perf_counter() - started)", str(json_file))
+            count, access = output.split()
+            assert int(count) == number
+            report(name, number, seconds)
+            print(f"{'':<40} {peak:>14.1f} MiB peak RSS, {float(access) * 1e3:.1f} ms to read item['size'] of all")
+
+
+# Run by python -c in the measured process: the time of one read, then the peak of the memory allocated by another
+# read traced by tracemalloc, printed as JSON.
+JSON_READ_DRIVER: str = """\
+import json, sys, time, tracemalloc
+from pathlib import Path
+from modules.lower_layer_modules.FileSideEffects import read_json
+json_file, select = Path(sys.argv[1]), json.loads(sys.argv[2])
+started = time.perf_counter()
+read_json(json_file, select=select)
+seconds = time.perf_counter() - started
+tracemalloc.start()
+read_json(json_file, select=select)
+print(json.dumps({"seconds": seconds, "allocated": tracemalloc.get_traced_memory()[1]}))
+"""
+
+
+def bench_json_select(number: int = 300_000) -> None:
+    """
+    time, peak allocation and peak RSS of read_json (the whole document by json.loads) vs. read_json with select
+    on a synthetic file of number records.
+    """
+    selections: dict[str, list[str] | None] = {
+        "read_json (json.loads)": None,
+        "select meta.version, items[*].id": ["meta.version", "items[*].id"],
+        "select items[*].path": ["items[*].path"],
+        "select meta.version": ["meta.version"],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        json_file: Path = Path(directory) / "records.json"
+        size: int = write_sample_json_records(json_file, number)
+        print(f"{number:,} records, {size / 2 ** 20:.1f} MiB")
+        for name, select in selections.items():
+            _, peak, output = measured_python(JSON_READ_DRIVER, str(json_file), json.dumps(select))
+            measured: dict[str, float] = json.loads(output)
+            report(name, number, measured["seconds"])
+            print(f"{'':<40} {measured['allocated'] / 2 ** 20:>14.1f} MiB peak allocation,"
+                  f" {peak:.1f} MiB peak RSS")
+
+
+def bench_cold_start(runs: int = 50, paths: tuple[str, ...] = ("src/exp.py", "../work/docs")) -> None:
+    """
+    end-to-end cold start latency of exp.py run as a subprocess against a stand-in explorer.exe, and its breakdown
+    taken from exp.py --profile itself: the spans of its telemetry records (the current directory, the resolution,
+    the WSL environment, the conversion, the launch... nested in "run"), and the time outside the profiled part,
+    split into the interpreter startup (a bare python -c pass) and the rest of it, the imports before the profiling
+    starts and the exit (each sample less the median startup).
+    The percentiles and the samples are written as JSON to $EXP_BENCH_RESULTS (default: ./bench_results)
+    /cold_start-<UTC time>.json, to compare the runs over time.
+    """
+    script_directory: Path = Path(__file__).resolve().parent
+    with tempfile.TemporaryDirectory() as directory:
+        environment: dict[str, str] = stand_in_environment(Path(directory))
+        working_directory: Path = Path(directory) / "work"
+        (working_directory / "src").mkdir(parents=True)
+        environment["PWD"] = str(working_directory)
+
+        def run(command: list[str]) -> float:
+            started: float = time.monotonic()
+            subprocess.run(command, env=environment, cwd=working_directory, check=True, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            return time.monotonic() - started
+
+        cli: list[str] = [sys.executable, str(script_directory / "exp.py"), *paths]
+        run(cli)
+        totals: list[float] = [run(cli) for _ in range(runs)]
+        telemetry: Path = Path(directory) / "telemetry.jsonl"
+        profiled: list[str] = [sys.executable, str(script_directory / "exp.py"), "--profile",
+                               f"--telemetry={telemetry}", *paths]
+        profiled_totals: list[float] = [run(profiled) for _ in range(runs)]
+        records: list[dict] = [json.loads(line) for line in telemetry.read_text(encoding="utf-8").splitlines()]
+        startups: list[float] = [run([sys.executable, "-c", "pass"]) for _ in range(runs)]
+        outside: list[float] = [total - record["elapsed_ms"] / 1e3 for total, record in zip(profiled_totals, records)]
+        samples: dict[str, list[float]] = {
+            "outside --profile": outside,
+            "interpreter startup (python -c pass)": startups,
+            "imports and exit": [outside_time - statistics.median(startups) for outside_time in outside]}
+        for record in records:
+            for name, span in record["spans"].items():
+                samples.setdefault(name, []).append(span["total_ms"] / 1e3)
+    report_latencies(f"exp.py {' '.join(paths)}", totals)
+    report_latencies(f"exp.py --profile {' '.join(paths)}", profiled_totals)
+    for phase, phase_samples in samples.items():
+        report_latencies(f"  {phase}", phase_samples)
+    results: Path = Path(os.environ.get("EXP_BENCH_RESULTS") or "bench_results") \
+        / f"cold_start-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}.json"
+    write_json({"benchmark": "cold_start", "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": sys.version, "platform": platform.platform(), "runs": runs, "paths": list(paths),
+                "total_ms": latency_percentiles(totals), "profiled_total_ms": latency_percentiles(profiled_totals),
+                "phases_ms": {phase: latency_percentiles(phase_samples) for phase, phase_samples in samples.items()},
+                "samples_ms": {"total": [total * 1e3 for total in totals],
+                               "profiled_total": [total * 1e3 for total in profiled_totals],
+                               **{phase: [sample * 1e3 for sample in phase_samples]
+                                  for phase, phase_samples in samples.items()}}},
+               results)
+    print(f"written to {results}")
+
+
+BENCHMARKS: Mapping[str, Callable[[], None]] = {
+    "batch_conversion": bench_batch_conversion,
+    "string_conversion": bench_string_conversion,
+    "cached_conversion": bench_cached_conversion,
+    "reverse_conversion": bench_reverse_conversion,
+    "mount_table_lookup": bench_mount_table_lookup,
+    "spawn_latency": bench_spawn_latency,
+    "daemon_latency": bench_daemon_latency,
+    "path_resolution": bench_path_resolution,
+    "batch_path_resolution": bench_batch_path_resolution,
+    "stream_conversion": bench_stream_conversion,
+    "launch_pipeline": bench_launch_pipeline,
+    "cold_start": bench_cold_start,
+    "json_stream": bench_json_stream,
+    "json_select": bench_json_select,
+    "json_cache": bench_json_cache,
+    "json_frozen": bench_json_frozen,
+    "json_compact": bench_json_compact,
+}
+
+
+def main() -> None:
+    """
+    The main procedure
+    """
+    names: list[str] = sys.argv[1:] or list(BENCHMARKS)
+    if "-h" in names or "--help" in names:
+        print(__doc__)
+        print("benchmarks: " + ", ".join(BENCHMARKS))
+        return
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.stderr.write(f"Unknown benchmark {name}. (choose from {', '.join(BENCHMARKS)})\n")
+            sys.exit(1)
+        print(f"# {name}")
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
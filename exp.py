@@ -3,24 +3,80 @@
     exp.py : open a directory or a file looked from WSL2 with Windows Explorer
              if it is in the Windows filesystem.
              If no path is specified, current directory is opened.
+             Glob patterns are expanded, and each distinct path is opened once.
+             With --convert, it is a filter converting the paths from the standard input to Windows paths.
 Usage:
-    exp.py [<path>]
+    exp.py [--detach] [--spawner=<spawner>] [--jobs=<jobs>] [--select] [--coalesce=<seconds>]
+           [--resolution=<resolution>] [--launcher=<launcher>]
+           [--profile] [--profile-output=<file>] [--telemetry=<file>] [<path>...]
+    exp.py --convert [-0]
 
     exp.py -h | --help
 
 Options:
     -h --help                Show this screen and exit.
+    --detach                 Return as soon as explorer.exe is spawned, without waiting for it.
+    --spawner=<spawner>      subprocess or posix_spawn [default: subprocess].
+    --jobs=<jobs>            The number of paths resolved and opened concurrently [default: 8].
+    --select                 Open each distinct parent directory once, selecting the first given path in it,
+                             instead of opening every path.
+    --coalesce=<seconds>     Skip a path already opened within the seconds, also by other exp.py processes
+                             [default: 0].
+    --resolution=<resolution>
+                             How relative paths are made absolute [default: resolve]:
+                             resolve stats every component of the path (a round trip each on /mnt/c),
+                             links normalizes "." and ".." lexically and resolves only the components outside
+                             the drvfs mounts which are actually symbolic links (a symbolic link on a drvfs
+                             mount is not followed, so "link/../x" there becomes "x"),
+                             lexical does not touch the filesystem at all.
+    --launcher=<launcher>    How to open the paths [default: explorer]: explorer (explorer.exe),
+                             wslview (the default application by wslu) or cmd (cmd.exe /c start).
+    --profile                Print the time taken by each phase (the current directory, the resolution,
+                             the conversion, the launch...) to the standard error, and append it as a JSON line
+                             to the telemetry file.
+    --profile-output=<file>  With --profile, also dump the cProfile statistics of the main thread to the file.
+    --telemetry=<file>       The telemetry file of --profile
+                             [default: $XDG_STATE_HOME/exp/telemetry.jsonl or ~/.local/state/exp/telemetry.jsonl].
+    --convert                Read paths from the standard input, one per line, and write the Windows paths
+                             to the standard output in the same order. A path which cannot be converted is
+                             reported to the standard error and skipped.
+    -0 --null                With --convert, the paths are separated by NUL both in the input and the output,
+                             e.g. find -print0 | exp.py --convert -0.
 """
 from __future__ import annotations
 
 import os
 import re
 import sys
+import threading
 from functools import reduce
 from pathlib import Path, PureWindowsPath, PurePath
-from subprocess import run
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterable, Iterator, Mapping, Sequence, TextIO, TypeVar, \
+    Union
 
-from modules.lower_layer_modules.FileSideEffects import relative_path2absolute
+from modules.lower_layer_modules.Exceptions import Error as ModuleError, MultipleUseError
+from modules.lower_layer_modules.FileSideEffects import PathResolution, PathResolver, logical_current_directory, \
+    relative_path2absolute
+from modules.lower_layer_modules.Launchers import CmdStartLauncher, ExplorerLauncher, Launcher, LaunchMode, Spawner, \
+    WslviewLauncher
+from modules.lower_layer_modules.MountTable import DrvfsMountTable, default_mount_table
+from modules.lower_layer_modules.WSLEnvironment import DEFAULT_DISTRIBUTION, WSLEnvironment, wsl_environment
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from modules.lower_layer_modules.Coalescing import LaunchCoalescer
+    from modules.lower_layer_modules.Profiling import PhaseTimer
+
+# argparse, asyncio, glob, concurrent.futures and the modules Caches, Coalescing and Profiling are imported where
+# they are used: most invocations open one path without options, and the startup time is most of the time exp.py
+# takes.
+# Without --profile, no PhaseTimer is made and the timed calls are only guarded by "timer is None".
+# test_exp.test_startup_import_budget keeps the imports of the plain invocation in check.
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def main() -> None:
@@ -30,16 +86,297 @@ def main() -> None:
     if os.name == "nt":
         print(f"This tool {__file__} is usable only on WSL2.\n")
         sys.exit(1)
+    timer: PhaseTimer | None = None
+    if any(argument.startswith("--profile") for argument in sys.argv[1:]):
+        from modules.lower_layer_modules.Profiling import PhaseTimer
+        timer = PhaseTimer()
     try:
-        current_directory: Path = Path(".").resolve()
-        to_open: Path = relative_path2absolute(Path(sys.argv[1]).expanduser(), relative_to=current_directory)
-        explorer: Path = Path(r"/mnt") / "c" / "Windows" / "explorer.exe"
-        open_on_windows(explorer, to_open)
-    except Error as e:
-        sys.stderr.write(e.args[0])
+        current_directory: Path = logical_current_directory() if timer is None \
+            else timer.call("current_directory", logical_current_directory)
+    except OSError as e:
+        sys.stderr.write(f"The current directory is not accessible. (message: {e.args})\n")
         sys.exit(1)
+    sys.exit(run_cli(sys.argv[1:], current_directory, timer=timer))
+
+
+def run_cli(
+        argv: Sequence[str],
+        current_directory: Path,
+        environment: WSLEnvironment | None = None,
+        stderr: TextIO | None = None,
+        stdin: BinaryIO | None = None,
+        stdout: BinaryIO | None = None,
+        launcher: Launcher | None = None,
+        timer: PhaseTimer | None = None
+) -> int:
+    """
+    run the command line procedure, also on behalf of a client of the resident daemon.
+    Args:
+        argv(Sequence[str]): the command line arguments without the program name
+        current_directory(pathlib.Path): the base of relative paths
+        environment(Optional[WSLEnvironment], optional): the WSL environment (default: discovered or cached one)
+        stderr(Optional[TextIO], optional): the stream for the error messages (default: sys.stderr)
+        stdin(Optional[BinaryIO], optional): the input of --convert (default: sys.stdin.buffer)
+        stdout(Optional[BinaryIO], optional): the output of --convert (default: sys.stdout.buffer)
+        launcher(Optional[Launcher], optional): the launcher overriding --launcher, e.g. RecordingLauncher()
+                                                (default: None)
+        timer(Optional[PhaseTimer], optional): the timer of --profile, already holding the spans before run_cli
+                                               (default: a new one with --profile)
+
+    Returns:
+        the exit status(int)
+    """
+    stderr = sys.stderr if stderr is None else stderr
+    try:
+        arguments: SimpleNamespace = parse_arguments(argv)
+    except (Error, ModuleError) as e:
+        stderr.write(str(e.args[0]).rstrip("\n") + "\n")
+        return 2 if isinstance(e, UsageError) else 1
+    # the files of the options are relative to current_directory, which differs from os.getcwd() in the daemon
+    for option in PATH_OPTIONS:
+        if getattr(arguments, option) is not None:
+            setattr(arguments, option, str(current_directory / getattr(arguments, option)))
+    if not arguments.profile:
+        return run_arguments(arguments, current_directory, environment, stderr, stdin, stdout, launcher, None)
+    return run_profiled(argv, arguments, current_directory, environment, stderr, stdin, stdout, launcher, timer)
+
+
+def run_profiled(
+        argv: Sequence[str],
+        arguments: SimpleNamespace,
+        current_directory: Path,
+        environment: WSLEnvironment | None,
+        stderr: TextIO,
+        stdin: BinaryIO | None,
+        stdout: BinaryIO | None,
+        launcher: Launcher | None,
+        timer: PhaseTimer | None
+) -> int:
+    """
+    run_arguments with --profile: print the phase breakdown to stderr, dump the cProfile statistics with
+    --profile-output, and append the breakdown to the telemetry file. A failure of the last two is reported
+    but does not change the exit status.
+    Args:
+        argv(Sequence[str]): the command line arguments without the program name
+        arguments(types.SimpleNamespace): the parsed arguments
+        current_directory(pathlib.Path): see run_cli
+        environment(Optional[WSLEnvironment]): see run_cli
+        stderr(TextIO): the stream for the error messages and the breakdown
+        stdin(Optional[BinaryIO]): see run_cli
+        stdout(Optional[BinaryIO]): see run_cli
+        launcher(Optional[Launcher]): see run_cli
+        timer(Optional[PhaseTimer]): see run_cli
+
+    Returns:
+        the exit status(int)
+    """
+    import time
+
+    from modules.lower_layer_modules.FileSideEffects import append_json_line
+    from modules.lower_layer_modules.Profiling import PhaseTimer, default_telemetry_file
+    timer = PhaseTimer() if timer is None else timer
+    profiler = None
+    if arguments.profile_output is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        status: int = timer.call("run", run_arguments, arguments, current_directory, environment, stderr, stdin,
+                                 stdout, launcher, timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    if profiler is not None:
+        try:
+            profiler.dump_stats(arguments.profile_output)
+        except OSError as e:
+            stderr.write(f"Dumping the profile to {arguments.profile_output} failed. (message: {e.args})\n")
+    stderr.write(timer.report())
+    try:
+        append_json_line({"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "argv": list(argv),
+                          "current_directory": str(current_directory), "status": status, **timer.record()},
+                         Path(arguments.telemetry) if arguments.telemetry else default_telemetry_file())
+    except ModuleError as e:
+        stderr.write(str(e.args[0]).rstrip("\n") + "\n")
+    return status
+
+
+def run_arguments(
+        arguments: SimpleNamespace,
+        current_directory: Path,
+        environment: WSLEnvironment | None,
+        stderr: TextIO,
+        stdin: BinaryIO | None,
+        stdout: BinaryIO | None,
+        launcher: Launcher | None,
+        timer: PhaseTimer | None
+) -> int:
+    """
+    run the command line procedure of the parsed arguments.
+    Args:
+        arguments(types.SimpleNamespace): the parsed arguments
+        current_directory(pathlib.Path): see run_cli
+        environment(Optional[WSLEnvironment]): see run_cli
+        stderr(TextIO): the stream for the error messages
+        stdin(Optional[BinaryIO]): see run_cli
+        stdout(Optional[BinaryIO]): see run_cli
+        launcher(Optional[Launcher]): see run_cli
+        timer(Optional[PhaseTimer]): the timer of the spans, or None not to time them
+
+    Returns:
+        the exit status(int)
+    """
+    try:
+        if arguments.convert:
+            if environment is None:
+                environment = wsl_environment()
+            failures_count: int = convert_stream(
+                sys.stdin.buffer if stdin is None else stdin, sys.stdout.buffer if stdout is None else stdout, stderr,
+                separator=b"\0" if arguments.null else b"\n", current_directory=current_directory,
+                distribution=environment.distribution, unc_host=environment.unc_host)
+            return 1 if failures_count else 0
+        resolved: Sequence[Union[Path, PathError]] = resolve_path_arguments(
+            arguments.paths, current_directory, jobs=arguments.jobs, resolution=PathResolution(arguments.resolution),
+            timer=timer)
+        if environment is None:
+            environment = wsl_environment() if timer is None else timer.call("environment", wsl_environment)
+        to_open: list[Path] = [path for path in resolved if isinstance(path, Path)]
+        if arguments.select:
+            to_open = [paths[0] for paths in group_by_parent(to_open).values()]
+        failures: Sequence[PathError] = open_paths_on_windows(
+            environment.explorer, to_open, jobs=arguments.jobs, select=arguments.select,
+            distribution=environment.distribution, unc_host=environment.unc_host,
+            mode=LaunchMode.DETACH if arguments.detach else LaunchMode.WAIT, spawner=Spawner(arguments.spawner),
+            coalescer=launch_coalescer(arguments.coalesce) if arguments.coalesce > 0 else None,
+            launcher=make_launcher(arguments.launcher, environment.explorer) if launcher is None else launcher,
+            timer=timer)
+    except (Error, ModuleError) as e:
+        stderr.write(str(e.args[0]).rstrip("\n") + "\n")
+        return 2 if isinstance(e, UsageError) else 1
     except KeyboardInterrupt:
-        sys.exit(1)
+        return 1
+    errors: list[PathError] = [path for path in resolved if isinstance(path, PathError)] \
+        + [failure for failure in failures if not isinstance(failure.error, MultipleUseError)]
+    for error in errors:
+        stderr.write(f"{error.path}: {str(error.args[0]).rstrip()}\n")
+    return 1 if errors else 0
+
+
+DEFAULT_ARGUMENTS: Mapping[str, Any] = {
+    "detach": False, "spawner": Spawner.SUBPROCESS.value, "jobs": 8, "select": False, "coalesce": 0.0,
+    "resolution": PathResolution.RESOLVE.value, "convert": False, "null": False, "launcher": ExplorerLauncher.name,
+    "profile": False, "profile_output": None, "telemetry": None}
+PATH_OPTIONS: Sequence[str] = ("profile_output", "telemetry")
+LAUNCHERS: Mapping[str, Callable[[], Launcher]] = {
+    launcher.name: launcher for launcher in (ExplorerLauncher, WslviewLauncher, CmdStartLauncher)}
+
+
+def parse_arguments(argv: Sequence[str]) -> SimpleNamespace:
+    """
+    parse the command line arguments.
+    Without any option, the arguments are all paths and argparse is not even imported.
+    Args:
+        argv(Sequence[str]): the command line arguments without the program name
+
+    Returns:
+        parsed arguments(types.SimpleNamespace)
+
+    Raises:
+        UsageError: the arguments are not correct.
+    """
+    if not any(argument.startswith("-") for argument in argv):
+        return SimpleNamespace(paths=list(argv) or ["."], **DEFAULT_ARGUMENTS)
+    parser = command_line_parser()
+    parser.set_defaults(**DEFAULT_ARGUMENTS)
+    arguments: SimpleNamespace = SimpleNamespace(**vars(parser.parse_args(argv)))
+    if arguments.convert and arguments.paths:
+        parser.error("--convert reads the paths from the standard input, not from the arguments")
+    if arguments.null and not arguments.convert:
+        parser.error("-0 is used only with --convert")
+    arguments.paths = arguments.paths or ["."]
+    arguments.profile = arguments.profile or arguments.profile_output is not None
+    return arguments
+
+
+def command_line_parser():
+    """
+    the argument parser raising UsageError instead of exiting, so that a daemon can report the error to its client.
+
+    Returns:
+        the parser(argparse.ArgumentParser)
+    """
+    import argparse
+
+    class CommandLineParser(argparse.ArgumentParser):
+        def error(self, message: str):
+            raise UsageError(f"{self.format_usage()}{self.prog}: error: {message}\n")
+
+    parser: argparse.ArgumentParser = CommandLineParser(
+        prog="exp.py", description="open a directory or a file looked from WSL2 with Windows Explorer.")
+    parser.add_argument("paths", nargs="*", default=[], metavar="path",
+                        help="the paths or glob patterns to open (default: current directory)")
+    parser.add_argument("--detach", action="store_true",
+                        help="return as soon as explorer.exe is spawned, without waiting for it")
+    parser.add_argument("--spawner", choices=[spawner.value for spawner in Spawner],
+                        help="how to spawn explorer.exe (default: subprocess)")
+    parser.add_argument("--jobs", type=positive_integer,
+                        help="the number of paths resolved and opened concurrently (default: 8)")
+    parser.add_argument("--select", action="store_true",
+                        help="open each distinct parent directory once, selecting the first given path in it")
+    parser.add_argument("--coalesce", type=float, metavar="SECONDS",
+                        help="skip a path already opened within the seconds, also by other exp.py processes")
+    parser.add_argument("--resolution", choices=[resolution.value for resolution in PathResolution],
+                        help="resolve: stat every component, links: resolve only actual symbolic links outside"
+                             " the drvfs mounts, lexical: no filesystem access (default: resolve)")
+    parser.add_argument("--launcher", choices=list(LAUNCHERS),
+                        help="explorer: explorer.exe, wslview: the default application by wslu,"
+                             " cmd: cmd.exe /c start (default: explorer)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time taken by each phase, and append it to the telemetry file")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="with --profile, dump the cProfile statistics of the main thread to the file")
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help="the JSON lines file of --profile (default: $XDG_STATE_HOME/exp/telemetry.jsonl)")
+    parser.add_argument("--convert", action="store_true",
+                        help="convert the paths from the standard input to Windows paths instead of opening them")
+    parser.add_argument("-0", "--null", action="store_true",
+                        help="with --convert, the paths are separated by NUL instead of newline")
+    return parser
+
+
+def make_launcher(name: str, explorer: Path) -> Launcher:
+    """
+    the launcher chosen by --launcher.
+    Args:
+        name(str): the name of the launcher in LAUNCHERS
+        explorer(pathlib.Path): the path to the Windows explorer, for the explorer launcher
+
+    Returns:
+        the launcher(Launcher)
+    """
+    return ExplorerLauncher(explorer) if name == ExplorerLauncher.name else LAUNCHERS[name]()
+
+
+def positive_integer(text: str) -> int:
+    """
+    argparse type of a positive integer.
+    Args:
+        text(str): the argument
+
+    Returns:
+        the integer(int)
+
+    Raises:
+        argparse.ArgumentTypeError: the argument is not a positive integer.
+    """
+    try:
+        value: int = int(text)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        import argparse
+        raise argparse.ArgumentTypeError(f"{text} is not a positive integer")
+    return value
 
 
 class Error(Exception):
@@ -56,6 +393,27 @@ class UsageError(Error):
     pass
 
 
+class PathError(Error):
+    """
+    The error for one of the paths handled together. It keeps the path and the original error.
+    """
+
+    def __init__(self, path: Union[str, PurePath], error: Exception):
+        super().__init__(str(error.args[0]) if error.args else repr(error))
+        self.path: Union[str, PurePath] = path
+        self.error: Exception = error
+
+
+WSL2_MOUNT_PATTERN: re.Pattern = re.compile(r"^/mnt/([a-z])(/?.*)")
+WSL2_DISTRIBUTION: str = DEFAULT_DISTRIBUTION
+WSL_UNC_HOST: str = "wsl$"
+GLOB_MAGIC_PATTERN: re.Pattern = re.compile(r"[*?\[]")
+WINDOWS_DRIVE_PATTERN: re.Pattern = re.compile(r"^([A-Za-z]):(?:[\\/](.*))?$", re.DOTALL)
+WSL_UNC_PATTERN: re.Pattern = re.compile(r"^[\\/]{2}(?:wsl\$|wsl\.localhost)[\\/]([^\\/]+)(?:[\\/](.*))?$",
+                                         re.IGNORECASE | re.DOTALL)
+WINDOWS_SEPARATOR_PATTERN: re.Pattern = re.compile(r"[\\/]")
+
+
 def wsl2_full_path2windows_path(wsl2_path: Path) -> PureWindowsPath:
     """
     convert a wsl2 path (posix path) to the corresponding windows' path.
@@ -69,7 +427,7 @@ def wsl2_full_path2windows_path(wsl2_path: Path) -> PureWindowsPath:
         UsageError: wsl2_path is not correct WSL2 path.
     """
     try:
-        [(drive, path)] = re.findall(r"^/mnt/([a-z])(/?.*)", wsl2_path.as_posix())
+        [(drive, path)] = WSL2_MOUNT_PATTERN.findall(wsl2_path.as_posix())
     except ValueError:
         raise UsageError(f"The input path {wsl2_path.as_posix()} is not a correct WSL2 path "
                          f"(function {wsl2_full_path2windows_path.__name__} "
@@ -78,6 +436,47 @@ def wsl2_full_path2windows_path(wsl2_path: Path) -> PureWindowsPath:
                   PureWindowsPath(rf"{drive}:\\"))
 
 
+def wsl2_paths2windows_paths(
+        wsl2_paths: Iterable[PurePath],
+        *,
+        strict: bool = False
+) -> Sequence[Union[PureWindowsPath, UsageError]]:
+    """
+    convert many wsl2 paths (posix paths) to the corresponding windows' paths in one pass.
+    A bad path does not stop the batch: its UsageError is put at its position of the result.
+    Args:
+        wsl2_paths(Iterable[pathlib.PurePath]): wsl2 paths
+        strict(bool, optional): raise a UsageError for all the bad paths after the whole batch is converted.
+                                (default: False)
+
+    Returns:
+        windows paths or UsageErrors in the input order (Sequence[Union[pathlib.PureWindowsPath, UsageError]])
+
+    Raises:
+        UsageError: some of wsl2_paths are not correct WSL2 paths and strict is True.
+    """
+    drive_roots: dict[str, PureWindowsPath] = {}
+    results: list[Union[PureWindowsPath, UsageError]] = []
+    for wsl2_path in wsl2_paths:
+        posix_path: str = wsl2_path.as_posix()
+        matched: re.Match | None = WSL2_MOUNT_PATTERN.match(posix_path)
+        if matched is None:
+            results.append(UsageError(f"The input path {posix_path} is not a correct WSL2 path "
+                                      f"(function {wsl2_paths2windows_paths.__name__} "
+                                      f"in module {__name__}).\n"))
+            continue
+        drive, path = matched.groups()
+        drive_root: PureWindowsPath | None = drive_roots.get(drive)
+        if drive_root is None:
+            drive_root = drive_roots[drive] = PureWindowsPath(rf"{drive}:\\")
+        results.append(drive_root.joinpath(*path.split("/")))
+    if strict:
+        errors: list[UsageError] = [result for result in results if isinstance(result, UsageError)]
+        if errors:
+            raise UsageError("".join(error.args[0] for error in errors))
+    return tuple(results)
+
+
 def is_wsl2_path(path: PurePath) -> bool:
     """
     Whether the given path is a correct WSL2 path.
@@ -90,26 +489,738 @@ def is_wsl2_path(path: PurePath) -> bool:
     return path.as_posix().startswith(r"/mnt/")
 
 
-def open_on_windows(explorer: Path, path: Path) -> None:
+def wsl2_path2unc_path(
+        wsl2_path: PurePath,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST
+) -> PureWindowsPath:
+    """
+    convert an absolute wsl2 path in the Linux filesystem to the UNC path through \\\\wsl$.
+    Args:
+        wsl2_path(pathlib.PurePath): absolute wsl2 path
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+
+    Returns:
+        UNC path(pathlib.PureWindowsPath)
+    """
+    return PureWindowsPath(rf"\\{unc_host}\{distribution}").joinpath(*wsl2_path.parts[1:])
+
+
+def normalize_posix_path_str(path: str) -> str:
+    """
+    normalize a posix path string in the same way as pathlib.PurePosixPath(path).as_posix(),
+    without constructing the path object.
+    Args:
+        path(str): posix path string
+
+    Returns:
+        normalized path string(str)
+    """
+    if path and "//" not in path and "/." not in path and not path.endswith("/") and not path.startswith("./"):
+        return path
+    root: str = ""
+    if path.startswith("/"):
+        root = "//" if path.startswith("//") and not path.startswith("///") else "/"
+    names: list[str] = [name for name in path.split("/") if name and name != "."]
+    return root + "/".join(names) if root or names else "."
+
+
+def wsl2_full_path2windows_str(wsl2_path: str) -> str:
+    """
+    string version of wsl2_full_path2windows_path: the result is identical to
+    str(wsl2_full_path2windows_path(pathlib.Path(wsl2_path))), but no pathlib object is built
+    for an ordinary /mnt/<drive>[/...] path.
+    Args:
+        wsl2_path(str):  wsl2 path
+
+    Returns:
+        windows path(str)
+
+    Raises:
+        UsageError: wsl2_path is not correct WSL2 path.
+    """
+    matched: re.Match | None = WSL2_MOUNT_PATTERN.match(normalize_posix_path_str(wsl2_path))
+    if matched is None:
+        raise UsageError(f"The input path {Path(wsl2_path).as_posix()} is not a correct WSL2 path "
+                         f"(function {wsl2_full_path2windows_str.__name__} "
+                         f"in module {__name__}).\n")
+    drive, path = matched.groups()
+    if "\\" in path or ":" in path or "\n" in wsl2_path or (path and not path.startswith("/")):
+        return str(wsl2_full_path2windows_path(Path(wsl2_path)))
+    return f"{drive}:\\" + path[1:].replace("/", "\\")
+
+
+def wsl2_path2unc_str(wsl2_path: str, distribution: str = WSL2_DISTRIBUTION, unc_host: str = WSL_UNC_HOST) -> str:
+    """
+    string version of wsl2_path2unc_path: the result is identical to
+    str(wsl2_path2unc_path(pathlib.Path(wsl2_path), distribution, unc_host)) for an absolute wsl2_path.
+    Args:
+        wsl2_path(str): absolute wsl2 path
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+
+    Returns:
+        UNC path(str)
+    """
+    path: str = normalize_posix_path_str(wsl2_path)
+    if "\\" in path or ":" in path:
+        return str(wsl2_path2unc_path(Path(wsl2_path), distribution, unc_host))
+    return "\\\\" + unc_host + "\\" + distribution + "\\" + path.lstrip("/").replace("/", "\\")
+
+
+def wsl2_path2windows_str(wsl2_path: str, distribution: str = WSL2_DISTRIBUTION, unc_host: str = WSL_UNC_HOST) -> str:
+    """
+    convert an absolute wsl2 path string to the windows' path string to be opened by explorer.exe:
+    the drive path for a path under /mnt, otherwise the UNC path through \\\\wsl$.
+    Args:
+        wsl2_path(str): absolute wsl2 path
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+
+    Returns:
+        windows path(str)
+
+    Raises:
+        UsageError: wsl2_path is under /mnt but not correct WSL2 path.
+    """
+    if normalize_posix_path_str(wsl2_path).startswith("/mnt/"):
+        return wsl2_full_path2windows_str(wsl2_path)
+    return wsl2_path2unc_str(wsl2_path, distribution, unc_host)
+
+
+def wsl2_path2native_windows_str(
+        wsl2_path: str,
+        distribution: str = WSL2_DISTRIBUTION,
+        mount_table: DrvfsMountTable | None = None,
+        unc_host: str = WSL_UNC_HOST
+) -> str:
+    """
+    convert an absolute wsl2 path string to the native windows' path string if it lives on a Windows volume
+    mounted anywhere (custom automount root, extra drvfs mounts, bind mounts of Windows folders),
+    by one longest-prefix lookup in the mount table. Otherwise, the same as wsl2_path2windows_str.
+    Args:
+        wsl2_path(str): absolute wsl2 path
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        mount_table(Optional[DrvfsMountTable], optional): the mount table (default: the one of this process)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+
+    Returns:
+        windows path(str)
+
+    Raises:
+        UsageError: wsl2_path is under /mnt but not correct WSL2 path.
+    """
+    if mount_table is None:
+        mount_table = default_mount_table()
+    native_path: str | None = mount_table.lookup(normalize_posix_path_str(wsl2_path))
+    if native_path is not None:
+        return native_path
+    return wsl2_path2windows_str(wsl2_path, distribution, unc_host)
+
+
+def windows_path2wsl2_path(windows_path: Union[str, PureWindowsPath], distribution: str | None = None) -> Path:
+    """
+    convert a windows' path to the corresponding wsl2 path (the reverse of wsl2_path2windows_str)
+    without spawning wslpath.
+    A drive path X:\\... is mapped under /mnt/x, and a UNC path \\\\wsl$\\<distribution>\\... or
+    \\\\wsl.localhost\\<distribution>\\... is mapped to the root of the Linux filesystem.
+    Args:
+        windows_path(Union[str, pathlib.PureWindowsPath]): absolute windows path
+        distribution(Optional[str], optional): if given, a UNC path must point into this WSL distribution.
+                                               (default: None)
+
+    Returns:
+        wsl2 path(pathlib.Path)
+
+    Raises:
+        UsageError: windows_path is neither an absolute drive path nor a UNC path into WSL.
+    """
+    windows_str: str = str(windows_path)
+    matched: re.Match | None = WINDOWS_DRIVE_PATTERN.match(windows_str)
+    if matched is not None:
+        drive, path = matched.groups()
+        root: str = f"/mnt/{drive.lower()}"
+    else:
+        matched = WSL_UNC_PATTERN.match(windows_str)
+        if matched is None or (distribution is not None and matched.group(1).lower() != distribution.lower()):
+            raise UsageError(f"The input path {windows_str} is not a windows path accessible from WSL2"
+                             f"{'' if distribution is None else f' distribution {distribution}'} "
+                             f"(function {windows_path2wsl2_path.__name__} "
+                             f"in module {__name__}).\n")
+        root, path = "", matched.group(2)
+    names: list[str] = [name for name in WINDOWS_SEPARATOR_PATTERN.split(path or "") if name and name != "."]
+    return Path(root + "/" + "/".join(names))
+
+
+def iter_windows_paths2wsl2_paths(
+        windows_paths: Iterable[Union[str, PureWindowsPath]],
+        distribution: str | None = None
+) -> Iterator[Union[Path, UsageError]]:
+    """
+    lazily convert windows' paths to the corresponding wsl2 paths.
+    A bad path does not stop the iteration: its UsageError is yielded at its position.
+    Args:
+        windows_paths(Iterable[Union[str, pathlib.PureWindowsPath]]): absolute windows paths
+        distribution(Optional[str], optional): if given, UNC paths must point into this WSL distribution.
+                                               (default: None)
+
+    Returns:
+        wsl2 paths or UsageErrors in the input order (Iterator[Union[pathlib.Path, UsageError]])
+    """
+    for windows_path in windows_paths:
+        try:
+            yield windows_path2wsl2_path(windows_path, distribution)
+        except UsageError as e:
+            yield e
+
+
+def windows_paths2wsl2_paths(
+        windows_paths: Iterable[Union[str, PureWindowsPath]],
+        distribution: str | None = None,
+        *,
+        strict: bool = False
+) -> Sequence[Union[Path, UsageError]]:
+    """
+    convert many windows' paths to the corresponding wsl2 paths, in the same manner as wsl2_paths2windows_paths.
+    Args:
+        windows_paths(Iterable[Union[str, pathlib.PureWindowsPath]]): absolute windows paths
+        distribution(Optional[str], optional): if given, UNC paths must point into this WSL distribution.
+                                               (default: None)
+        strict(bool, optional): raise a UsageError for all the bad paths after the whole batch is converted.
+                                (default: False)
+
+    Returns:
+        wsl2 paths or UsageErrors in the input order (Sequence[Union[pathlib.Path, UsageError]])
+
+    Raises:
+        UsageError: some of windows_paths are not accessible from WSL2 and strict is True.
+    """
+    results: tuple[Union[Path, UsageError], ...] = tuple(iter_windows_paths2wsl2_paths(windows_paths, distribution))
+    if strict:
+        errors: list[UsageError] = [result for result in results if isinstance(result, UsageError)]
+        if errors:
+            raise UsageError("".join(error.args[0] for error in errors))
+    return results
+
+
+CONVERSION_CACHE_SIZE: int = 1024
+
+# Opt-in memoized variants for long-running processes which convert the same paths repeatedly.
+# Each has cache_info() (hits, misses, evictions) and cache_clear(), and is safe to call from multiple threads.
+# They are made on the first access of cached_<name> through the module __getattr__.
+CACHED_FUNCTION_NAMES: tuple[str, ...] = ("wsl2_full_path2windows_path", "is_wsl2_path", "wsl2_path2windows_str")
+_cached_functions_lock: threading.Lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Callable[..., Any]:
+    """
+    make cached_<name> for the names in CACHED_FUNCTION_NAMES on the first access (PEP 562).
+    Args:
+        name(str): the attribute name
+
+    Returns:
+        the memoized function(Callable[..., Any])
+
+    Raises:
+        AttributeError: there is no such attribute.
+    """
+    function_name: str = name.removeprefix("cached_")
+    if function_name == name or function_name not in CACHED_FUNCTION_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from modules.lower_layer_modules.Caches import lru_cached
+    with _cached_functions_lock:
+        if name not in globals():
+            globals()[name] = lru_cached(CONVERSION_CACHE_SIZE)(globals()[function_name])
+        return globals()[name]
+
+
+def launch_coalescer(window: float) -> LaunchCoalescer:
+    """
+    the launch coalescer of the window, importing the module Coalescing only when coalescing is asked.
+    Args:
+        window(float): the coalescing window in seconds
+
+    Returns:
+        the coalescer(LaunchCoalescer)
+    """
+    from modules.lower_layer_modules.Coalescing import LaunchCoalescer
+    return LaunchCoalescer(window)
+
+
+def map_concurrently(function: Callable[[T], R], items: Iterable[T], jobs: int) -> list[R]:
+    """
+    map function on items in a thread pool of jobs threads, keeping the order.
+    A single item or a single job is mapped in this thread, without importing concurrent.futures.
+    Args:
+        function(Callable[[T], R]): the function
+        items(Iterable[T]): the items
+        jobs(int): the maximum number of concurrent calls
+
+    Returns:
+        the results (list[R])
+    """
+    items = list(items)
+    if len(items) <= 1 or jobs <= 1:
+        return [function(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        return list(executor.map(function, items))
+
+
+def open_on_windows(
+        explorer: Path,
+        path: Path,
+        *,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST,
+        mode: LaunchMode = LaunchMode.WAIT,
+        spawner: Spawner = Spawner.SUBPROCESS,
+        select: bool = False,
+        coalescer: LaunchCoalescer | None = None,
+        launcher: Launcher | None = None,
+        timer: PhaseTimer | None = None
+) -> None:
     """
-    open path on Windows with explorer.exe
+    open path on Windows with explorer.exe, or with another launcher
 
     Args:
         explorer(pathlib.Path): the path to the Windows explorer.
         path(pathlib.Path): the specified path.
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+        mode(LaunchMode, optional): WAIT for explorer.exe to exit, or DETACH it and return at once.
+                                    (default: LaunchMode.WAIT)
+        spawner(Spawner, optional): spawn explorer.exe with subprocess or with os.posix_spawnp and a small
+                                    environment. (default: Spawner.SUBPROCESS)
+        select(bool, optional): open the parent directory with path selected (explorer.exe /select,<path>).
+                                (default: False)
+        coalescer(Optional[LaunchCoalescer], optional): drop the request if the same windows path was opened
+                                                        within its window. A failed launch is not counted.
+                                                        (default: None)
+        launcher(Optional[Launcher], optional): how to open the windows path, e.g. WslviewLauncher(), or
+                                                RecordingLauncher() launching nothing.
+                                                (default: ExplorerLauncher(explorer))
+        timer(Optional[PhaseTimer], optional): time the conversion and the launch, for --profile (default: None)
 
     Raises:
         NotInspectableError: the specified path is not inspectable from Windows system.
+        UsageError: the launcher cannot open the path.
+        ProcessError: explorer.exe could not be spawned.
+        MultipleUseError: the same windows path was opened within the window of coalescer.
     """
-    if is_wsl2_path(path):
-        windows_path: PureWindowsPath = wsl2_full_path2windows_path(path)
-        run([explorer, windows_path])
-        return
-    wsl_windows_path: PureWindowsPath = PureWindowsPath("\\wsl$") / "Ubuntu-20.04"
-    run([explorer, wsl_windows_path / path])
+    launcher = ExplorerLauncher(explorer) if launcher is None else launcher
+    if timer is None:
+        windows_path: str = wsl2_path2native_windows_str(path.as_posix(), distribution, unc_host=unc_host)
+    else:
+        windows_path = timer.call("conversion", wsl2_path2native_windows_str, path.as_posix(), distribution,
+                                  unc_host=unc_host)
+    key: str = f"/select,{windows_path}" if select else windows_path
+    claimed: float | None = None if coalescer is None else coalescer.claim(key)
+    try:
+        if timer is None:
+            launcher.open(windows_path, select=select, mode=mode, spawner=spawner)
+        else:
+            timer.call("launch", launcher.open, windows_path, select=select, mode=mode, spawner=spawner)
+    except (Error, ModuleError):
+        if claimed is not None:
+            coalescer.release(key, claimed)
+        raise
     return
 
 
+def expand_path_arguments(path_arguments: Iterable[str], current_directory: Path) -> Sequence[str]:
+    """
+    expand "~" and glob patterns of the path arguments.
+    A pattern matching nothing is kept as it is, so that its failure is reported for the path.
+    Args:
+        path_arguments(Iterable[str]): the path arguments
+        current_directory(pathlib.Path): the base of relative patterns
+
+    Returns:
+        expanded paths(Sequence[str])
+    """
+    expanded: list[str] = []
+    for path_argument in path_arguments:
+        path_argument = os.path.expanduser(path_argument)
+        matched: list[str] = []
+        if GLOB_MAGIC_PATTERN.search(path_argument):
+            import glob
+            matched = sorted(glob.glob(path_argument, root_dir=current_directory))
+        expanded.extend(matched or [path_argument])
+    return expanded
+
+
+def resolve_path_arguments(
+        path_arguments: Iterable[str],
+        current_directory: Path,
+        *,
+        jobs: int = 8,
+        resolution: PathResolution = PathResolution.RESOLVE,
+        timer: PhaseTimer | None = None
+) -> Sequence[Union[Path, PathError]]:
+    """
+    expand, resolve to absolute paths and deduplicate the path arguments.
+    With several paths to look up, the resolved directories are shared by all of them (PathResolver), so each
+    distinct directory is looked up once. A single path is resolved alone, where the sharing costs more calls.
+    Each look-up on a drvfs mount is a slow round trip, so the paths are resolved concurrently in a thread pool.
+    Args:
+        path_arguments(Iterable[str]): the path arguments, possibly glob patterns
+        current_directory(pathlib.Path): the base of relative paths
+        jobs(int, optional): the maximum number of concurrent resolutions (default: 8)
+        resolution(PathResolution, optional): how to make the paths absolute. With PathResolution.LINKS,
+                                              the drvfs mounts are not searched for symbolic links.
+                                              (default: PathResolution.RESOLVE)
+        timer(Optional[PhaseTimer], optional): time the resolution of each path and of all, for --profile
+                                               (default: None)
+
+    Returns:
+        distinct absolute paths, or PathErrors for unresolvable ones, in the argument order
+        (Sequence[Union[pathlib.Path, PathError]])
+    """
+    link_free_prefixes: Sequence[str] = tuple(mount.mount_point for mount in default_mount_table().mounts) \
+        if resolution is PathResolution.LINKS else ()
+
+    expanded: Sequence[str] = expand_path_arguments(path_arguments, current_directory)
+    # RESOLVE leaves absolute paths as they are; the other resolutions look up every path
+    looked_up: int = sum(1 for path in expanded if resolution is not PathResolution.RESOLVE or not os.path.isabs(path))
+    resolve_path: Callable[[Path], Path]
+    if looked_up > 1:
+        resolve_path = PathResolver(current_directory, resolution=resolution,
+                                    link_free_prefixes=link_free_prefixes).resolve
+    else:
+        def resolve_path(path: Path) -> Path:
+            return relative_path2absolute(path, current_directory, resolution=resolution,
+                                          link_free_prefixes=link_free_prefixes)
+
+    def resolve(path_argument: str) -> Union[Path, PathError]:
+        try:
+            return resolve_path(Path(path_argument)) if timer is None \
+                else timer.call("relative_path2absolute", resolve_path, Path(path_argument))
+        except (OSError, RuntimeError) as e:
+            return PathError(path_argument, e)
+
+    resolved: list[Union[Path, PathError]] = map_concurrently(resolve, expanded, jobs) if timer is None \
+        else timer.call("resolution", map_concurrently, resolve, expanded, jobs)
+    return tuple(dict.fromkeys(resolved))
+
+
+def open_paths_on_windows(
+        explorer: Path,
+        paths: Iterable[Path],
+        *,
+        jobs: int = 8,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST,
+        mode: LaunchMode = LaunchMode.WAIT,
+        spawner: Spawner = Spawner.SUBPROCESS,
+        select: bool = False,
+        coalescer: LaunchCoalescer | None = None,
+        launcher: Launcher | None = None,
+        timer: PhaseTimer | None = None
+) -> Sequence[PathError]:
+    """
+    open many paths on Windows with explorer.exe, at most jobs of them at once.
+    A failure of one path does not stop the others.
+    Args:
+        explorer(pathlib.Path): the path to the Windows explorer.
+        paths(Iterable[pathlib.Path]): the absolute paths
+        jobs(int, optional): the maximum number of concurrent launches (default: 8)
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+        mode(LaunchMode, optional): see open_on_windows (default: LaunchMode.WAIT)
+        spawner(Spawner, optional): see open_on_windows (default: Spawner.SUBPROCESS)
+        select(bool, optional): see open_on_windows (default: False)
+        coalescer(Optional[LaunchCoalescer], optional): see open_on_windows (default: None)
+        launcher(Optional[Launcher], optional): see open_on_windows (default: ExplorerLauncher(explorer))
+        timer(Optional[PhaseTimer], optional): see open_on_windows (default: None)
+
+    Returns:
+        the errors of the paths failed to open (Sequence[PathError])
+    """
+    def open_path(path: Path) -> PathError | None:
+        try:
+            open_on_windows(explorer, path, distribution=distribution, unc_host=unc_host, mode=mode, spawner=spawner,
+                            select=select, coalescer=coalescer, launcher=launcher, timer=timer)
+        except (Error, ModuleError) as e:
+            return PathError(path, e)
+        return None
+
+    opened: list[PathError | None] = map_concurrently(open_path, paths, jobs) if timer is None \
+        else timer.call("open", map_concurrently, open_path, paths, jobs)
+    return tuple(error for error in opened if error is not None)
+
+
+async def async_open_on_windows(
+        explorer: Path,
+        path: Path,
+        *,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST,
+        mode: LaunchMode = LaunchMode.WAIT,
+        select: bool = False,
+        coalescer: LaunchCoalescer | None = None,
+        timeout: float | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+        launcher: Launcher | None = None
+) -> None:
+    """
+    the async counterpart of open_on_windows, spawning explorer.exe with asyncio.create_subprocess_exec
+    without blocking the event loop.
+
+    Args:
+        explorer(pathlib.Path): the path to the Windows explorer.
+        path(pathlib.Path): the specified path.
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+        mode(LaunchMode, optional): see open_on_windows (default: LaunchMode.WAIT)
+        select(bool, optional): see open_on_windows (default: False)
+        coalescer(Optional[LaunchCoalescer], optional): see open_on_windows (default: None)
+        timeout(Optional[float], optional): the seconds to wait for explorer.exe with LaunchMode.WAIT.
+                                            It is killed after that. (default: None, no limit)
+        semaphore(Optional[asyncio.Semaphore], optional): held while explorer.exe is spawned and waited for,
+                                                          to limit the concurrent launches. (default: None)
+        launcher(Optional[Launcher], optional): see open_on_windows (default: ExplorerLauncher(explorer))
+
+    Raises:
+        NotInspectableError: the specified path is not inspectable from Windows system.
+        ProcessError: explorer.exe could not be spawned, or did not exit within timeout.
+        MultipleUseError: the same windows path was opened within the window of coalescer.
+        asyncio.CancelledError: the task was cancelled. explorer.exe being waited for is killed.
+    """
+    import asyncio
+    import contextlib
+    windows_path: str = wsl2_path2native_windows_str(path.as_posix(), distribution, unc_host=unc_host)
+    key: str = f"/select,{windows_path}" if select else windows_path
+    claimed: float | None = None if coalescer is None else await asyncio.to_thread(coalescer.claim, key)
+    try:
+        async with semaphore if semaphore is not None else contextlib.nullcontext():
+            await (ExplorerLauncher(explorer) if launcher is None else launcher).async_open(
+                windows_path, select=select, mode=mode, timeout=timeout)
+    except (Error, ModuleError):
+        if claimed is not None:
+            await asyncio.to_thread(coalescer.release, key, claimed)
+        raise
+
+
+async def async_open_paths_on_windows(
+        explorer: Path,
+        paths: Iterable[Path],
+        *,
+        jobs: int = 8,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST,
+        mode: LaunchMode = LaunchMode.WAIT,
+        select: bool = False,
+        coalescer: LaunchCoalescer | None = None,
+        timeout: float | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+        launcher: Launcher | None = None
+) -> Sequence[PathError]:
+    """
+    the async counterpart of open_paths_on_windows: open many paths on Windows with explorer.exe,
+    at most jobs of them at once. A failure of one path does not stop the others, but a cancellation does.
+    Args:
+        explorer(pathlib.Path): the path to the Windows explorer.
+        paths(Iterable[pathlib.Path]): the absolute paths
+        jobs(int, optional): the maximum number of concurrent launches, unless semaphore is given (default: 8)
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+        mode(LaunchMode, optional): see open_on_windows (default: LaunchMode.WAIT)
+        select(bool, optional): see open_on_windows (default: False)
+        coalescer(Optional[LaunchCoalescer], optional): see open_on_windows (default: None)
+        timeout(Optional[float], optional): see async_open_on_windows (default: None)
+        semaphore(Optional[asyncio.Semaphore], optional): the limit of the concurrent launches shared with
+                                                          other calls (default: asyncio.Semaphore(jobs))
+        launcher(Optional[Launcher], optional): see open_on_windows (default: ExplorerLauncher(explorer))
+
+    Returns:
+        the errors of the paths failed to open (Sequence[PathError])
+
+    Raises:
+        asyncio.CancelledError: the task was cancelled. The launches in progress are cancelled too.
+    """
+    import asyncio
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(jobs)
+
+    async def open_path(path: Path) -> PathError | None:
+        try:
+            await async_open_on_windows(explorer, path, distribution=distribution, unc_host=unc_host, mode=mode,
+                                        select=select, coalescer=coalescer, timeout=timeout, semaphore=semaphore,
+                                        launcher=launcher)
+        except (Error, ModuleError) as e:
+            return PathError(path, e)
+        return None
+
+    results: list[PathError | None] = await asyncio.gather(*(open_path(path) for path in paths))
+    return tuple(error for error in results if error is not None)
+
+
+async def async_resolve_path_arguments(
+        path_arguments: Iterable[str],
+        current_directory: Path,
+        *,
+        jobs: int = 8,
+        resolution: PathResolution = PathResolution.RESOLVE
+) -> Sequence[Union[Path, PathError]]:
+    """
+    the async counterpart of resolve_path_arguments. The resolution stats the filesystem (a round trip each on
+    /mnt/c), so it runs in a worker thread.
+    Args:
+        path_arguments(Iterable[str]): the path arguments, possibly glob patterns
+        current_directory(pathlib.Path): the base of relative paths
+        jobs(int, optional): the maximum number of concurrent resolutions (default: 8)
+        resolution(PathResolution, optional): see resolve_path_arguments (default: PathResolution.RESOLVE)
+
+    Returns:
+        distinct absolute paths, or PathErrors for unresolvable ones, in the argument order
+        (Sequence[Union[pathlib.Path, PathError]])
+
+    Raises:
+        asyncio.CancelledError: the task was cancelled. The worker thread finishes the resolution in the background.
+    """
+    import asyncio
+    return await asyncio.to_thread(resolve_path_arguments, list(path_arguments), current_directory, jobs=jobs,
+                                   resolution=resolution)
+
+
+async def async_path_arguments2windows_strs(
+        path_arguments: Iterable[str],
+        current_directory: Path,
+        *,
+        jobs: int = 8,
+        resolution: PathResolution = PathResolution.RESOLVE,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST
+) -> Sequence[Union[str, PathError]]:
+    """
+    resolve the path arguments as async_resolve_path_arguments, and convert them to the windows paths to be opened
+    by explorer.exe. The conversion itself is a string operation and done in the event loop.
+    Args:
+        path_arguments(Iterable[str]): the path arguments, possibly glob patterns
+        current_directory(pathlib.Path): the base of relative paths
+        jobs(int, optional): the maximum number of concurrent resolutions (default: 8)
+        resolution(PathResolution, optional): see resolve_path_arguments (default: PathResolution.RESOLVE)
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+
+    Returns:
+        the windows paths, or PathErrors for the paths failed to resolve or convert (Sequence[Union[str, PathError]])
+
+    Raises:
+        asyncio.CancelledError: the task was cancelled.
+    """
+    def convert(path: Union[Path, PathError]) -> Union[str, PathError]:
+        if isinstance(path, PathError):
+            return path
+        try:
+            return wsl2_path2native_windows_str(path.as_posix(), distribution, unc_host=unc_host)
+        except (Error, ModuleError) as e:
+            return PathError(path, e)
+
+    return tuple(convert(path) for path in await async_resolve_path_arguments(
+        path_arguments, current_directory, jobs=jobs, resolution=resolution))
+
+
+CONVERSION_CHUNK_SIZE: int = 1 << 16
+
+
+def iter_separated(stream: BinaryIO, separator: bytes = b"\n", chunk_size: int = CONVERSION_CHUNK_SIZE
+                   ) -> Iterator[list[bytes]]:
+    """
+    read a stream chunk by chunk and split it into the records terminated (or separated) by separator.
+    Only a chunk and an incomplete record are held at once, however long the stream is.
+    Args:
+        stream(BinaryIO): the input stream
+        separator(bytes, optional): the separator of the records (default: b"\n")
+        chunk_size(int, optional): the size of a read (default: CONVERSION_CHUNK_SIZE)
+
+    Returns:
+        the complete records in each chunk (Iterator[list[bytes]])
+    """
+    read: Callable[[int], bytes] = getattr(stream, "read1", stream.read)
+    rest: bytes = b""
+    while chunk := read(chunk_size):
+        records: list[bytes] = (rest + chunk).split(separator)
+        rest = records.pop()
+        if records:
+            yield records
+    if rest:
+        yield [rest]
+
+
+def convert_stream(
+        input_stream: BinaryIO,
+        output_stream: BinaryIO,
+        error_stream: TextIO,
+        *,
+        separator: bytes = b"\n",
+        current_directory: Path | None = None,
+        distribution: str = WSL2_DISTRIBUTION,
+        unc_host: str = WSL_UNC_HOST,
+        mount_table: DrvfsMountTable | None = None
+) -> int:
+    """
+    convert the wsl2 paths read from input_stream to windows paths, and write them to output_stream
+    terminated by the same separator, one write per input chunk.
+    A relative path is joined to current_directory without touching the filesystem, and an empty record is skipped.
+    A path which cannot be converted is reported to error_stream and skipped, without stopping the conversion.
+    Args:
+        input_stream(BinaryIO): the separated wsl2 paths
+        output_stream(BinaryIO): the stream for the windows paths
+        error_stream(TextIO): the stream for the error messages
+        separator(bytes, optional): b"\n" or b"\0" (default: b"\n")
+        current_directory(Optional[pathlib.Path], optional): the base of relative paths (default: the current directory)
+        distribution(str, optional): the WSL distribution name (default: WSL2_DISTRIBUTION)
+        unc_host(str, optional): "wsl$" or "wsl.localhost" (default: WSL_UNC_HOST)
+        mount_table(Optional[DrvfsMountTable], optional): the mount table (default: the one of this process)
+
+    Returns:
+        the number of the paths failed to convert (int)
+    """
+    if mount_table is None:
+        mount_table = default_mount_table()
+    base: str = os.fspath(logical_current_directory() if current_directory is None else current_directory)
+    failures: int = 0
+    for records in iter_separated(input_stream, separator):
+        converted: list[bytes] = []
+        for record in records:
+            if not record:
+                continue
+            path: str = os.fsdecode(record)
+            try:
+                if not path.startswith("/"):
+                    path = os.path.join(base, path)
+                converted.append(wsl2_path2native_windows_str(path, distribution, mount_table, unc_host)
+                                 .encode("utf-8", "surrogateescape"))
+            except (Error, ModuleError) as e:
+                failures += 1
+                error_stream.write(f"{path}: {str(e.args[0]).rstrip()}\n")
+        if converted:
+            converted.append(b"")
+            output_stream.write(separator.join(converted))
+    output_stream.flush()
+    return failures
+
+
+def group_by_parent(paths: Iterable[PurePath]) -> Mapping[PurePath, Sequence[PurePath]]:
+    """
+    group paths by their parent directories, keeping the order of the first appearance.
+    With explorer.exe /select,<the first path> per group, the number of launches is the number of
+    distinct directories, not the number of paths.
+    Args:
+        paths(Iterable[pathlib.PurePath]): the paths
+
+    Returns:
+        the paths for each parent directory (Mapping[pathlib.PurePath, Sequence[pathlib.PurePath]])
+    """
+    groups: dict[PurePath, list[PurePath]] = {}
+    for path in paths:
+        groups.setdefault(path.parent, []).append(path)
+    return groups
+
+
 if __name__ == '__main__':
     main()
     sys.exit(0)
@@ -0,0 +1,168 @@
+#! /usr/bin/env python
+"""Overview:
+    expc.py : the thin client of the resident exp daemon (expd.py).
+              It forwards the arguments and the current directory to the daemon through a Unix domain socket,
+              and falls back to exp.py when no daemon is listening. Once the request is sent, it is never run
+              again by exp.py, since the daemon may have opened the paths already.
+Usage:
+    expc.py [<exp.py arguments>...]
+
+Environment:
+    EXP_SOCKET               The socket path [default: $XDG_RUNTIME_DIR/exp/exp.sock or /tmp/exp-<uid>/exp.sock].
+"""
+from __future__ import annotations
+
+import _socket
+import os
+import sys
+
+# Keep the imports of this module to os, sys and the C-level _socket (the socket wrapper module pulls in enum,
+# selectors and more): the startup time of this client is the whole point of it.
+
+EXP_SCRIPT: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exp.py")
+
+
+def socket_path() -> str:
+    """
+    The path of the Unix domain socket of the daemon.
+
+    Returns:
+        socket path(str)
+    """
+    if os.environ.get("EXP_SOCKET"):
+        return os.environ["EXP_SOCKET"]
+    runtime_directory: str = os.environ.get("XDG_RUNTIME_DIR", "")
+    if runtime_directory:
+        return os.path.join(runtime_directory, "exp", "exp.sock")
+    return os.path.join("/tmp", f"exp-{os.getuid()}", "exp.sock")
+
+
+def encode_request(current_directory: str, argv: list[str]) -> bytes:
+    """
+    encode a request: the current directory and the arguments separated by NUL.
+    Args:
+        current_directory(str): the current directory of the client
+        argv(list[str]): the command line arguments without the program name
+
+    Returns:
+        request(bytes)
+    """
+    return "\0".join([current_directory, *argv]).encode("utf-8", "surrogateescape")
+
+
+def decode_request(request: bytes) -> tuple[str, list[str]]:
+    """
+    decode a request encoded by encode_request.
+    Args:
+        request(bytes): request
+
+    Returns:
+        the current directory and the arguments (tuple[str, list[str]])
+    """
+    current_directory, *argv = request.decode("utf-8", "surrogateescape").split("\0")
+    return current_directory, argv
+
+
+def encode_response(status: int, message: str) -> bytes:
+    """
+    encode a response: the exit status, NUL and the error messages.
+    Args:
+        status(int): exit status
+        message(str): error messages
+
+    Returns:
+        response(bytes)
+    """
+    return f"{status}\0{message}".encode("utf-8", "surrogateescape")
+
+
+def decode_response(response: bytes) -> tuple[int, str]:
+    """
+    decode a response encoded by encode_response.
+    Args:
+        response(bytes): response
+
+    Returns:
+        the exit status and the error messages (tuple[int, str])
+    """
+    status, _, message = response.decode("utf-8", "surrogateescape").partition("\0")
+    return int(status), message
+
+
+def connect_daemon(path: str) -> _socket.socket:
+    """
+    connect to the daemon, and check that the daemon is run by the same user before anything is sent:
+    under /tmp, another user could have made the socket directory first and be listening there.
+    Args:
+        path(str): the socket path
+
+    Returns:
+        the connection(_socket.socket)
+
+    Raises:
+        OSError: no daemon is listening on the socket, or the daemon is run by another user (PermissionError).
+    """
+    connection: _socket.socket = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+        # struct ucred {pid_t pid; uid_t uid; gid_t gid;}
+        credentials: bytes = connection.getsockopt(_socket.SOL_SOCKET, _socket.SO_PEERCRED, 12)
+        uid: int = int.from_bytes(credentials[4:8], sys.byteorder)
+        if uid != os.getuid():
+            raise PermissionError(f"The daemon on {path} is run by uid {uid}, not by this user.")
+    except OSError:
+        connection.close()
+        raise
+    return connection
+
+
+def request_daemon(connection: _socket.socket, argv: list[str], current_directory: str) -> tuple[int, str]:
+    """
+    send a request to the connected daemon and wait for the response. The connection is closed.
+    Args:
+        connection(_socket.socket): the connection made by connect_daemon
+        argv(list[str]): the command line arguments without the program name
+        current_directory(str): the current directory
+
+    Returns:
+        the exit status and the error messages (tuple[int, str])
+
+    Raises:
+        OSError: the connection is broken.
+        ValueError: the response is empty or broken, e.g. the daemon died while running the request.
+    """
+    try:
+        connection.sendall(encode_request(current_directory, argv))
+        connection.shutdown(_socket.SHUT_WR)
+        chunks: list[bytes] = []
+        while chunk := connection.recv(65536):
+            chunks.append(chunk)
+    finally:
+        connection.close()
+    return decode_response(b"".join(chunks))
+
+
+def main() -> None:
+    """
+    The main procedure
+    """
+    argv: list[str] = sys.argv[1:]
+    # the daemon does not read the standard input of the client, so --convert runs in exp.py
+    if not {"-h", "--help", "--convert"}.intersection(argv):
+        path: str = socket_path()
+        try:
+            connection: _socket.socket = connect_daemon(path)
+        except OSError:
+            pass
+        else:
+            try:
+                status, message = request_daemon(connection, argv, os.getcwd())
+            except (OSError, ValueError) as e:
+                status, message = 1, f"The request to the exp daemon on {path} failed after it was sent. ({e!r})\n"
+            sys.stderr.write(message)
+            sys.exit(status)
+    os.execv(sys.executable, [sys.executable, EXP_SCRIPT, *argv])
+
+
+if __name__ == '__main__':
+    main()
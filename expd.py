@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+"""Overview:
+    expd.py : the resident daemon of exp.py.
+              It keeps the discovered WSL environment and the mount table warm, and runs exp.py requests
+              forwarded by the thin client expc.py through a Unix domain socket.
+              Restart it after the WSL environment (PATH, WINDIR, WSL_DISTRO_NAME) changes.
+Usage:
+    expd.py [--socket=<path>]
+
+    expd.py -h | --help
+
+Options:
+    -h --help                Show this screen and exit.
+    --socket=<path>          The socket path [default: $EXP_SOCKET, $XDG_RUNTIME_DIR/exp/exp.sock
+                             or /tmp/exp-<uid>/exp.sock].
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import socket
+import socketserver
+import struct
+import sys
+from pathlib import Path
+
+import exp
+from expc import decode_request, encode_response, socket_path
+from modules.lower_layer_modules.Coalescing import prepare_private_directory
+from modules.lower_layer_modules.Exceptions import Error as ModuleError, MultipleUseError
+from modules.lower_layer_modules.MountTable import default_mount_table
+from modules.lower_layer_modules.WSLEnvironment import WSLEnvironment, wsl_environment
+
+PEER_CREDENTIALS: struct.Struct = struct.Struct("3i")
+
+
+def main() -> None:
+    """
+    The main procedure
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="expd.py", description="the resident daemon of exp.py, serving expc.py.")
+    parser.add_argument("--socket", default=None, help="the socket path")
+    arguments: argparse.Namespace = parser.parse_args()
+    try:
+        with ExpDaemon(Path(arguments.socket or socket_path()), wsl_environment()) as daemon:
+            daemon.serve_forever()
+    except (exp.Error, ModuleError) as e:
+        sys.stderr.write(str(e.args[0]).rstrip("\n") + "\n")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """
+    Run one exp.py request of a client and answer the exit status and the error messages.
+    """
+
+    def handle(self) -> None:
+        connection: socket.socket = self.request
+        _, uid, _ = PEER_CREDENTIALS.unpack(connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                                  PEER_CREDENTIALS.size))
+        if uid != os.getuid():
+            connection.sendall(encode_response(1, f"The exp daemon serves only the user of uid {os.getuid()}.\n"))
+            return
+        chunks: list[bytes] = []
+        while chunk := connection.recv(65536):
+            chunks.append(chunk)
+        if not chunks:
+            return
+        current_directory, argv = decode_request(b"".join(chunks))
+        stderr: io.StringIO = io.StringIO()
+        try:
+            status: int = exp.run_cli(argv, Path(current_directory), self.server.environment, stderr)
+        except Exception as e:
+            # the paths may have been opened already, so the client must not run the request again
+            stderr.write(f"The exp daemon failed to run the request. (message: {e!r})\n")
+            status = 1
+        connection.sendall(encode_response(status, stderr.getvalue()))
+
+
+class ExpDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    The Unix domain socket server of exp.py. Each request is handled in its own thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, path: Path, environment: WSLEnvironment):
+        """
+        Args:
+            path(pathlib.Path): the socket path
+            environment(WSLEnvironment): the WSL environment kept for all the requests
+
+        Raises:
+            MultipleUseError: another daemon is listening on the socket.
+            DataWriteError: the directory of the socket cannot be made, or is not private to this user.
+        """
+        if is_listening(path):
+            raise MultipleUseError(f"Another daemon is listening on {path}."
+                                   f" ({ExpDaemon.__name__} in module {__name__})")
+        prepare_private_directory(path.parent)
+        path.unlink(missing_ok=True)
+        self.path: Path = path
+        self.environment: WSLEnvironment = environment
+        default_mount_table()
+        old_mask: int = os.umask(0o177)
+        try:
+            super().__init__(str(path), RequestHandler)
+        finally:
+            os.umask(old_mask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def is_listening(path: Path) -> bool:
+    """
+    Whether a daemon is listening on the socket.
+    Args:
+        path(pathlib.Path): the socket path
+
+    Returns:
+        True if listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,176 @@
+"""
+Cachesモジュール: スレッドセーフなサイズ上限付きLRUキャッシュ
+"""
+from __future__ import annotations
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+from .Exceptions import UsageError
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheInfo(NamedTuple):
+    """
+    キャッシュの統計情報
+    """
+    hits: int
+    misses: int
+    evictions: int
+    max_size: int
+    current_size: int
+    current_weight: int = 0
+    max_weight: Optional[int] = None
+
+
+class LRUCache(Generic[K, V]):
+    """
+    エントリ数上限付きのLRUキャッシュ。全ての操作はロックで保護されるので、スレッド間で共有してよい。
+    weighを与えると、エントリの重み(メモリ使用量の見積もりなど)の合計にも上限を設ける。
+    """
+
+    def __init__(self, max_size: int = 1024, *, max_weight: Optional[int] = None,
+                 weigh: Optional[Callable[[V], int]] = None):
+        """
+        Args:
+            max_size(int, optional): 最大エントリ数 (default: 1024)
+            max_weight(Optional[int], optional): 重みの合計の上限 (default: None、上限なし)
+            weigh(Optional[Callable[[V], int]], optional): 値の重み。ロックの外で、登録する値ごとに1回呼ぶ
+                                                           (default: None、全て0)
+        Raises:
+            UsageError: max_sizeまたはmax_weightが正でない
+        """
+        if max_size <= 0 or (max_weight is not None and max_weight <= 0):
+            raise UsageError(f"The maximum size and weight of a cache must be positive,"
+                             f" but {max_size} and {max_weight} are given."
+                             f" ({LRUCache.__name__} in module {__name__})")
+        self._max_size: int = max_size
+        self._max_weight: Optional[int] = max_weight
+        self._weigh: Optional[Callable[[V], int]] = weigh
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._weights: dict[K, int] = {}
+        self._weight: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
+    def get_or_compute(self, key: K, compute: Callable[[], V], valid: Optional[Callable[[V], bool]] = None) -> V:
+        """
+        キャッシュされた値を返す。なければcomputeで計算して登録する。computeが送出した例外はキャッシュしない。
+        Args:
+            key(K): キー
+            compute(Callable[[], V]): 値の計算
+            valid(Optional[Callable[[V], bool]], optional): キャッシュされた値がまだ使えるか。使えなければ
+                                                            ミスとして計算し直す (default: None、常に使える)
+        Returns:
+            値(V)
+        """
+        with self._lock:
+            try:
+                value: V = self._entries[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                if valid is None or valid(value):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                self._remove(key)
+                self._misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """
+        値を登録する。上限を超えたら最も古く使われたエントリから捨てる。重みだけで上限を超える値は登録しない。
+        Args:
+            key(K): キー
+            value(V): 値
+        """
+        weight: int = 0 if self._weigh is None else self._weigh(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self._max_weight is not None and weight > self._max_weight:
+                return
+            self._entries[key] = value
+            self._weights[key] = weight
+            self._weight += weight
+            while len(self._entries) > self._max_size \
+                    or (self._max_weight is not None and self._weight > self._max_weight):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """
+        キーが条件に合うエントリを捨てる。統計情報は変えない。
+        Args:
+            predicate(Callable[[K], bool]): 条件
+        Returns:
+            捨てたエントリ数(int)
+        """
+        with self._lock:
+            keys: list[K] = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def _remove(self, key: K) -> None:
+        del self._entries[key]
+        self._weight -= self._weights.pop(key)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        統計情報
+        Returns:
+            統計情報(CacheInfo)
+        """
+        with self._lock:
+            return CacheInfo(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                             max_size=self._max_size, current_size=len(self._entries),
+                             current_weight=self._weight, max_weight=self._max_weight)
+
+    def cache_clear(self) -> None:
+        """
+        全エントリと統計情報を消去する
+        """
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self._weight = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+# lru_cachedのキーで、位置引数とキーワード引数を分ける印
+_KEYWORD_MARK: object = object()
+
+
+def lru_cached(max_size: int = 1024) -> Callable[[Callable[..., V]], Callable[..., V]]:
+    """
+    引数をキーとしてLRUCacheで結果をキャッシュする関数デコレータ。キーワード引数は名前の順に並べてキーに加えるので、
+    f(a, b=1)とf(a, b=1)は同じエントリだが、f(a, 1)とは別のエントリになる(functools.lru_cacheと同じ)。
+    デコレートされた関数はcache_info()とcache_clear()を持つ。
+    Args:
+        max_size(int, optional): 最大エントリ数 (default: 1024)
+    Returns:
+        デコレータ(Callable[[Callable[..., V]], Callable[..., V]])
+    """
+    def decorator(function: Callable[..., V]) -> Callable[..., V]:
+        cache: LRUCache[tuple, V] = LRUCache(max_size)
+
+        @functools.wraps(function)
+        def cached(*args: Hashable, **kwargs: Hashable) -> V:
+            key: tuple = (*args, _KEYWORD_MARK, *sorted(kwargs.items())) if kwargs else args
+            return cache.get_or_compute(key, lambda: function(*args, **kwargs))
+
+        cached.cache_info = cache.cache_info
+        cached.cache_clear = cache.cache_clear
+        return cached
+
+    return decorator
@@ -0,0 +1,139 @@
+"""
+Coalescingモジュール: 短時間に繰り返される同一の起動要求を、プロセスをまたいで間引く
+"""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import json
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Iterator
+
+from .Exceptions import DataWriteError, MultipleUseError
+from .FileSideEffects import prepare_directory
+
+
+def default_state_file() -> Path:
+    """
+    状態ファイルのデフォルトの場所 ($XDG_RUNTIME_DIR/exp/launches.json、なければ/tmp/exp-<uid>/launches.json)。
+    ディレクトリは、自分だけが使えるもの(prepare_private_directory)でなければ使わない。
+    Returns:
+        状態ファイル(pathlib.Path)
+    """
+    runtime_directory: str | None = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory:
+        return Path(runtime_directory) / "exp" / "launches.json"
+    return Path("/tmp") / f"exp-{os.getuid()}" / "launches.json"
+
+
+def prepare_private_directory(directory: Path) -> None:
+    """
+    自分だけが読み書きできるディレクトリを用意する。/tmpのように他のユーザーも書ける場所で、
+    先に作られたディレクトリやシンボリックリンクに状態ファイルを置かないように、既にあるものは確かめて拒む。
+    Args:
+        directory(pathlib.Path): ディレクトリパス
+    Raises:
+        DataWriteError: 作れない、またはシンボリックリンク、他人の所有、グループや他人に許可があるもの
+    """
+    prepare_directory(directory.parent)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    except OSError as err:
+        raise DataWriteError(f"Making the directory {directory} failed."
+                             f" (message: {err.args}, {prepare_private_directory.__name__} in module {__name__})")
+    try:
+        status: os.stat_result = os.lstat(directory)
+    except OSError as err:
+        raise DataWriteError(f"Inspecting the directory {directory} failed."
+                             f" (message: {err.args}, {prepare_private_directory.__name__} in module {__name__})")
+    if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise DataWriteError(f"The directory {directory} is not a private directory of the user"
+                             f" (a directory owned by uid {os.getuid()} with mode 0700), so it is refused."
+                             f" ({prepare_private_directory.__name__} in module {__name__})")
+
+
+class LaunchCoalescer:
+    """
+    キーごとの最終起動時刻を、flockで保護した小さなJSONファイルに記録する。
+    時間窓の中で同じキーが再び要求されたら、MultipleUseErrorで衝突を知らせる。
+    """
+
+    def __init__(self, window: float, state_file: Path | None = None):
+        """
+        Args:
+            window(float): 同一とみなす時間窓(秒)
+            state_file(Optional[pathlib.Path], optional): 状態ファイル (default: default_state_file())
+        """
+        self.window: float = window
+        self.state_file: Path = default_state_file() if state_file is None else state_file
+
+    def claim(self, key: str) -> float:
+        """
+        キーの起動を予約する。時間窓の外の記録は捨てる。起動に失敗したら、返した時刻でreleaseして予約を取り消す。
+        Args:
+            key(str): 起動要求のキー(変換後のWindowsパスなど)
+        Returns:
+            予約した時刻(float)
+        Raises:
+            MultipleUseError: 時間窓の中で同じキーが既に起動された
+            DataWriteError: 状態ファイルの読み書き失敗
+        """
+        with self._locked_launches() as launches:
+            now: float = time.time()
+            last_launch: float | None = launches.get(key)
+            if last_launch is not None and 0 <= now - last_launch < self.window:
+                raise MultipleUseError(f"{key} was launched {now - last_launch:.3f} s ago,"
+                                       f" within the coalescing window of {self.window} s."
+                                       f" ({self.claim.__name__} in module {__name__})")
+            for launched_key in [launched_key for launched_key, launched in launches.items()
+                                 if not 0 <= now - launched < self.window]:
+                del launches[launched_key]
+            launches[key] = now
+        return now
+
+    def release(self, key: str, claimed: float) -> None:
+        """
+        起動に失敗したキーの予約を取り消し、時間窓の中でもすぐに再び起動できるようにする。
+        その後に別の要求が予約し直していれば、その予約は残す。
+        Args:
+            key(str): 起動要求のキー
+            claimed(float): claimが返した時刻
+        Raises:
+            DataWriteError: 状態ファイルの読み書き失敗
+        """
+        with self._locked_launches() as launches:
+            if launches.get(key) == claimed:
+                del launches[key]
+
+    @contextlib.contextmanager
+    def _locked_launches(self) -> Iterator[dict[str, float]]:
+        """
+        状態ファイルをflockして、キーごとの最終起動時刻を読み、ブロックが例外なく終われば書き戻す
+        Returns:
+            キーごとの最終起動時刻(Iterator[dict[str, float]])
+        Raises:
+            DataWriteError: 状態ファイルの読み書き失敗
+        """
+        prepare_private_directory(self.state_file.parent)
+        try:
+            descriptor: int = os.open(self.state_file, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC | os.O_NOFOLLOW, 0o600)
+        except OSError as err:
+            raise DataWriteError(f"Opening the launch state file {self.state_file} failed."
+                                 f" (message: {err.args}, {self._locked_launches.__name__} in module {__name__})")
+        with open(descriptor, "r+", encoding="utf-8") as state:
+            fcntl.flock(state, fcntl.LOCK_EX)
+            try:
+                launches: dict[str, float] = json.loads(state.read() or "{}")
+            except json.JSONDecodeError:
+                launches = {}
+            if not isinstance(launches, dict):
+                launches = {}
+            yield launches
+            state.seek(0)
+            state.truncate()
+            json.dump(launches, state)
@@ -3,20 +3,31 @@ FileSideEffectsモジュール: ファイルシステムに関する副作用
 """
 from __future__ import annotations
 
-import csv
-import inspect
-import io
-import json
-from json import JSONDecodeError
+import os
+from enum import Enum
 from pathlib import Path
 from types import MappingProxyType
-from typing import Union, Mapping, Any, Sequence, Iterable
+from typing import Union, Mapping, Any, Sequence, Iterable, Iterator, MutableMapping, NamedTuple, Optional, BinaryIO
 
 from .Exceptions import DataWriteError, DataReadError
 
+# csv, io, jsonとJSONStreams, FrozenJSONは、exp.pyの起動を軽くするため、使う関数の中でimportする
+
 JSONWritable = Union[Mapping[str, Any], Sequence[Any], str, int, float]
 
 
+class PathResolution(Enum):
+    """
+    絶対パス化の方法。
+    RESOLVEはPath.resolve()で全ての要素をstatする。drvfs(/mnt/c)ではstatの1回ごとに9Pの往復になる。
+    LINKSは"."と".."を字句的に正規化し、link_free_prefixesの外の要素だけをlstatして、実際にシンボリックリンクである
+    要素だけを解決する。LEXICALはファイルシステムに一切触れない("../"の前の要素がリンクでも字句的に消す)。
+    """
+    RESOLVE = "resolve"
+    LINKS = "links"
+    LEXICAL = "lexical"
+
+
 def prepare_directory(
         output_directory: Path
 ) -> None:
@@ -32,23 +43,132 @@ def prepare_directory(
             raise DataWriteError(e.args)
 
 
-def read_json(json_file: Path, *, encoding="utf-8") -> Mapping[str, Any]:
+def read_json(
+        json_file: Path,
+        *,
+        encoding="utf-8",
+        select: Optional[Iterable[str]] = None,
+        frozen: bool = False,
+        compact: bool = False
+) -> Mapping[str, Any]:
     """
     JSONファイルを読み出す
     Args:
         json_file(pathlib.Path): JSONファイル
         encoding(str, optional): テキストエンコーディング (default: "utf-8")
+        select(Optional[Iterable[str]], optional): 読む値の位置。例えば["meta.version", "items[*].id"]なら
+                                                   {"meta": {"version": 3}, "items": [{"id": 1}, ...]}を返す。
+                                                   ほかの部分木はPythonのオブジェクトを作らずに読み飛ばし、
+                                                   その中の文法の誤りは検出しない (default: None、全体を読む)
+        frozen(bool, optional): 最上位だけでなく、深く変更できない値にする。オブジェクトはMappingProxyType、配列は
+                                tupleになり、コピーせずにスレッド間で共有してよい(FrozenJSONモジュール) (default: False)
+        compact(bool, optional): frozenに加えて、同じキーの組が繰り返すオブジェクトを、キーの組を共有するCompactRecordにして
+                                 メモリを減らす。同じ形のオブジェクトの配列では、最初の要素だけがMappingProxyTypeになる
+                                 (default: False)
     Returns:
         JSON辞書(Mapping[str, Any])
     Raises:
-        DataReadError: JSONパース失敗
+        UsageError: selectの位置の書き方が正しくない
+        DataReadError: JSONパース失敗(selectで読み飛ばす部分木の中を除く)
     """
+    if select is not None:
+        return read_selected_json(json_file, select, encoding=encoding, frozen=frozen, compact=compact)
+    import json
     try:
+        if compact:
+            from .FrozenJSON import loads_compact
+            return loads_compact(read_text_contents(json_file, encoding=encoding))
+        if frozen:
+            from .FrozenJSON import loads_frozen
+            return loads_frozen(read_text_contents(json_file, encoding=encoding))
         return MappingProxyType(json.loads(read_text_contents(json_file, encoding=encoding)))
-    except JSONDecodeError as err:
+    except json.JSONDecodeError as err:
+        raise DataReadError(f"data readout of JSON file {json_file} failed."
+                            f" (message: {err.args},"
+                            f" {read_json.__name__} in module {__name__})")
+
+
+def read_selected_json(
+        json_file: Path,
+        select: Iterable[str],
+        *,
+        encoding="utf-8",
+        frozen: bool = False,
+        compact: bool = False
+) -> Mapping[str, Any]:
+    """
+    JSONファイルの、位置にある値だけを元の入れ子の形のまま読む。ファイルはチャンクごとに読み、位置にない部分木は
+    Pythonのオブジェクトを作らずに読み飛ばす。型(オブジェクトか配列か)が位置に合わない値は結果から省く。
+    読み飛ばす部分木は括弧の対応と文字列の閉じだけを確かめ、その中の文法の誤りは検出しない。
+    Args:
+        json_file(pathlib.Path): JSONファイル
+        select(Iterable[str]): 読む値の位置("meta.version"、"items[*].id"など)
+        encoding(str, optional): テキストエンコーディング (default: "utf-8")
+        frozen(bool, optional): 深く変更できない値にする (default: False)
+        compact(bool, optional): 深く変更できない値にし、同じキーの組が繰り返すオブジェクトをCompactRecordにする
+                                 (default: False)
+    Returns:
+        JSON辞書(Mapping[str, Any])
+    Raises:
+        UsageError: 位置の書き方が正しくない
+        DataReadError: ファイルの読み出し失敗、JSONパース失敗(読み飛ばす部分木の中を除く)、
+                       または最上位がオブジェクトでない
+    """
+    from .JSONStreams import project_json
+    select = tuple(select)
+    try:
+        with open(json_file, "rb") as stream:
+            selected: Any = project_json(stream, select, name=f"file {json_file}", encoding=encoding)
+    except OSError as err:
         raise DataReadError(f"data readout of JSON file {json_file} failed."
                             f" (message: {err.args},"
-                            f" {inspect.currentframe().f_code.co_name} in module {__name__})")
+                            f" {read_selected_json.__name__} in module {__name__})")
+    if not isinstance(selected, dict):
+        raise DataReadError(f"The JSON file {json_file} is not an object having the selected paths {select}."
+                            f" ({read_selected_json.__name__} in module {__name__})")
+    if compact:
+        from .FrozenJSON import compact_json
+        return compact_json(selected)
+    if frozen:
+        from .FrozenJSON import freeze_json
+        return freeze_json(selected)
+    return MappingProxyType(selected)
+
+
+def iter_json_items(
+        json_file: Path,
+        prefix: str = "[*]",
+        *,
+        encoding="utf-8",
+        chunk_size: int = 1 << 16
+) -> Iterator[Any]:
+    """
+    JSONファイルを固定サイズのチャンクごとに読み、位置にある値を1つずつ返す。ファイル全体を読み込まないので、
+    メモリより大きなファイルも読める。メモリ使用量はチャンクサイズと、返す値1つ分の大きさに収まる。
+    位置にない部分木は括弧の対応と文字列の閉じだけを確かめて読み飛ばし、その中の文法の誤りは検出しない。
+    Args:
+        json_file(pathlib.Path): JSONファイル
+        prefix(str, optional): 値の位置。"[*]"は最上位の配列の要素、"items[*].id"はitemsの各要素のid、
+                               "meta.version"はその値1つ (default: "[*]")
+        encoding(str, optional): テキストエンコーディング。UTF-8などASCII互換のもの (default: "utf-8")
+        chunk_size(int, optional): 一度に読むバイト数 (default: 65536)
+    Returns:
+        値のイテレータ(Iterator[Any])
+    Raises:
+        UsageError: 位置の書き方が正しくない
+        DataReadError: ファイルの読み出し失敗、またはJSONパース失敗(読み飛ばす部分木の中を除く)。
+                       メッセージにバイト位置を含む
+    """
+    from .JSONStreams import iter_json_values
+    try:
+        stream: BinaryIO = open(json_file, "rb")
+    except OSError as err:
+        raise DataReadError(f"data readout of JSON file {json_file} failed."
+                            f" (message: {err.args},"
+                            f" {iter_json_items.__name__} in module {__name__})")
+    with stream:
+        yield from iter_json_values(stream, prefix, name=f"file {json_file}", encoding=encoding,
+                                    chunk_size=chunk_size)
 
 
 def write_json(
@@ -65,9 +185,10 @@ def write_json(
     Raises:
         DataWriteError: データ読み出し失敗
     """
+    import json
     if json_file.is_dir():
         raise DataWriteError(f"The specified path {json_file} is a directory so not writable."
-                             f" ({inspect.currentframe().f_code.co_name} in module {__name__}")
+                             f" ({write_json.__name__} in module {__name__}")
     try:
         prepare_directory(json_file.parent)
         with open(json_file, mode="w", encoding="utf-8", newline="\n") as f:
@@ -75,7 +196,28 @@ def write_json(
     except (OSError, TypeError) as err:
         raise DataWriteError(f"data writing of JSON to {json_file} failed."
                              f" (message: {err.args},"
-                             f" {inspect.currentframe().f_code.co_name} in module {__name__})")
+                             f" {write_json.__name__} in module {__name__})")
+
+
+def append_json_line(json_writable: JSONWritable, json_lines_file: Path) -> None:
+    """
+    JSON Lines形式のファイルの末尾に1行追記する。ファイルがなければ作る。
+    Args:
+        json_writable(JSONWritable): 辞書など
+        json_lines_file(pathlib.Path): JSON Linesファイル
+    Raises:
+        DataWriteError: データ書き込み失敗
+    """
+    import json
+    try:
+        line: str = json.dumps(json_writable, ensure_ascii=False, separators=(",", ":")) + "\n"
+        prepare_directory(json_lines_file.parent)
+        with open(json_lines_file, mode="a", encoding="utf-8", newline="\n") as f:
+            f.write(line)
+    except (OSError, TypeError, ValueError) as err:
+        raise DataWriteError(f"appending a JSON line to {json_lines_file} failed."
+                             f" (message: {err.args},"
+                             f" {append_json_line.__name__} in module {__name__})")
 
 
 def read_text_contents(file: Path, *, encoding="utf-8") -> str:
@@ -91,14 +233,14 @@ def read_text_contents(file: Path, *, encoding="utf-8") -> str:
     """
     if not file.is_file():
         raise DataReadError(f"The specified file {file} does not exist."
-                            f" ({inspect.currentframe().f_code.co_name} in module {__name__}")
+                            f" ({read_text_contents.__name__} in module {__name__}")
     try:
         with open(file, encoding=encoding) as f:
             return f.read()
     except UnicodeDecodeError as err:
         raise DataReadError(f"The specified file {file} has an invalid character to read in {encoding} encoding"
                             f" (message: {err.args},"
-                            f" {inspect.currentframe().f_code.co_name} in module {__name__})")
+                            f" {read_text_contents.__name__} in module {__name__})")
 
 
 def write_text_contents2file(contents: str, file: Path, *, encoding="utf-8") -> None:
@@ -119,7 +261,7 @@ def write_text_contents2file(contents: str, file: Path, *, encoding="utf-8") ->
     except UnicodeDecodeError as err:
         raise DataWriteError(f"Writing text contents failed because of existence of an invalid character."
                              f" (message: {err.args},"
-                             f" {inspect.currentframe().f_code.co_name} in module {__name__})")
+                             f" {write_text_contents2file.__name__} in module {__name__})")
 
 
 def parse_csv_contents(csv_contents_text: str) -> Sequence[Sequence[str]]:
@@ -130,6 +272,8 @@ def parse_csv_contents(csv_contents_text: str) -> Sequence[Sequence[str]]:
     Returns:
         CSV配列(Sequence[Sequence[str]])
     """
+    import csv
+    import io
     with io.StringIO() as stream:
         stream.write(csv_contents_text)
         stream.seek(0)
@@ -139,20 +283,209 @@ def parse_csv_contents(csv_contents_text: str) -> Sequence[Sequence[str]]:
 
 def relative_path2absolute(
         path: Path,
-        relative_to=None
+        relative_to=None,
+        *,
+        resolution: PathResolution = PathResolution.RESOLVE,
+        link_free_prefixes: Sequence[str] = ()
 ) -> Path:
     """
-    もしパスが相対パスなら絶対パスにする。絶対パスならそのまま。
+    もしパスが相対パスなら絶対パスにする。絶対パスならそのまま(RESOLVE以外では正規化する)。
 
     Args:
         path(pathlib.Path): パス
         relative_to(p.Path, optional): 相対パスの起点。デフォルトは./
+        resolution(PathResolution, optional): 絶対パス化の方法 (default: PathResolution.RESOLVE)
+        link_free_prefixes(Sequence[str], optional): LINKSで、リンクを探さない(statしない)ディレクトリ (default: ())
 
     Returns:
         絶対パスに変換したパス(pathlib.Path)
     """
+    if resolution is PathResolution.RESOLVE:
+        if relative_to is None:
+            relative_to: Path = Path("..").resolve()
+        if not path.is_absolute():
+            return (relative_to / path).resolve()
+        return Path(path)
     if relative_to is None:
-        relative_to: Path = Path("..").resolve()
-    if not path.is_absolute():
-        return (relative_to / path).resolve()
-    return Path(path)
+        relative_to = logical_current_directory()
+    absolute: str = os.path.join(relative_to, path)
+    if resolution is PathResolution.LEXICAL:
+        return Path(os.path.normpath(absolute))
+    return Path(resolve_links(absolute, link_free_prefixes))
+
+
+def resolve_links(absolute_path: str, link_free_prefixes: Sequence[str] = ()) -> str:
+    """
+    絶対パスの"."と".."を正規化し、シンボリックリンクである要素だけを解決する。
+    各要素は".."で消される前にlstatするので、リンクの後の".."も正しく解決される。
+    link_free_prefixesの下の要素はstatしない。存在しない要素はそのまま残す。
+    Args:
+        absolute_path(str): 絶対パス
+        link_free_prefixes(Sequence[str], optional): リンクを探さないディレクトリ (default: ())
+    Returns:
+        正規化したパス(str)
+    """
+    link_free: tuple[str, ...] = tuple(prefix.rstrip("/") + "/" for prefix in link_free_prefixes)
+    resolved: str = "/"
+    for part in absolute_path.split("/"):
+        if part in ("", "."):
+            continue
+        if part == "..":
+            resolved = os.path.dirname(resolved)
+            continue
+        candidate: str = resolved + part if resolved == "/" else f"{resolved}/{part}"
+        if not (candidate + "/").startswith(link_free) and os.path.islink(candidate):
+            candidate = os.path.realpath(candidate)
+        resolved = candidate
+    return resolved
+
+
+class DirectoryListing(NamedTuple):
+    """
+    ディレクトリの中のシンボリックリンクの名前。inodeとmtimeが変わらなければ、エントリは変わっていない。
+    """
+    inode: int
+    mtime_ns: int
+    links: frozenset[str]
+
+
+class PathResolver:
+    """
+    多数の相対パスの絶対パス化で、解決済みのディレクトリの接頭辞を記憶して使い回す。
+    ディレクトリごとに1回だけstatとos.scandirでシンボリックリンクを調べるので、ファイルシステムの呼び出しは
+    パスの数ではなく、異なるディレクトリの数に比例する。
+    listingsを複数のPathResolverで共有すると、inodeとmtimeが変わらないディレクトリは読み直さない。
+    スレッド間で共有してよい(同じディレクトリを重複して調べることはある)。
+    """
+
+    def __init__(
+            self,
+            relative_to: Optional[Path] = None,
+            *,
+            resolution: PathResolution = PathResolution.RESOLVE,
+            link_free_prefixes: Sequence[str] = (),
+            listings: Optional[MutableMapping[str, DirectoryListing]] = None
+    ):
+        """
+        Args:
+            relative_to(Optional[pathlib.Path], optional): 相対パスの起点 (default: relative_path2absoluteと同じ)
+            resolution(PathResolution, optional): 絶対パス化の方法 (default: PathResolution.RESOLVE)
+            link_free_prefixes(Sequence[str], optional): リンクを探さないディレクトリ (default: ())
+            listings(Optional[MutableMapping[str, DirectoryListing]], optional): 解決済みディレクトリの
+                                                                                 リンク一覧 (default: 新しい辞書)
+        """
+        if relative_to is None:
+            relative_to = Path("..").resolve() if resolution is PathResolution.RESOLVE \
+                else logical_current_directory()
+        self.relative_to: Path = relative_to
+        self.resolution: PathResolution = resolution
+        self.listings: MutableMapping[str, DirectoryListing] = {} if listings is None else listings
+        self._link_free: tuple[str, ...] = tuple(prefix.rstrip("/") + "/" for prefix in link_free_prefixes)
+        self._prefixes: dict[str, str] = {}
+        self._links: dict[str, frozenset[str]] = {}
+
+    def resolve(self, path: Path) -> Path:
+        """
+        relative_path2absoluteと同じ絶対パスを返す。
+        Args:
+            path(pathlib.Path): パス
+        Returns:
+            絶対パスに変換したパス(pathlib.Path)
+        """
+        if self.resolution is PathResolution.LEXICAL:
+            return Path(os.path.normpath(os.path.join(self.relative_to, path)))
+        if self.resolution is PathResolution.RESOLVE and path.is_absolute():
+            return Path(path)
+        return Path(self._resolve_prefix(os.path.join(os.getcwd(), self.relative_to, path).rstrip("/")))
+
+    def _resolve_prefix(self, unresolved: str) -> str:
+        """
+        "/"で始まるパスの接頭辞を、親ディレクトリから順に解決して記憶する
+        """
+        try:
+            return self._prefixes[unresolved]
+        except KeyError:
+            pass
+        parent, _, name = unresolved.rpartition("/")
+        resolved_parent: str = self._resolve_prefix(parent) if parent else "/"
+        if name in ("", "."):
+            resolved: str = resolved_parent
+        elif name == "..":
+            resolved = os.path.dirname(resolved_parent)
+        else:
+            resolved = resolved_parent + name if resolved_parent == "/" else f"{resolved_parent}/{name}"
+            if name in self._links_in(resolved_parent):
+                resolved = os.path.realpath(resolved)
+        self._prefixes[unresolved] = resolved
+        return resolved
+
+    def _links_in(self, directory: str) -> frozenset[str]:
+        """
+        解決済みのディレクトリの中のシンボリックリンクの名前。存在しないディレクトリやlink_free_prefixesの下では空。
+        """
+        try:
+            return self._links[directory]
+        except KeyError:
+            pass
+        links: frozenset[str] = frozenset()
+        if not (directory.rstrip("/") + "/").startswith(self._link_free):
+            try:
+                status: os.stat_result = os.stat(directory)
+                listing: Optional[DirectoryListing] = self.listings.get(directory)
+                if listing is None or (listing.inode, listing.mtime_ns) != (status.st_ino, status.st_mtime_ns):
+                    with os.scandir(directory) as entries:
+                        listing = DirectoryListing(inode=status.st_ino, mtime_ns=status.st_mtime_ns,
+                                                   links=frozenset(entry.name for entry in entries
+                                                                   if entry.is_symlink()))
+                    self.listings[directory] = listing
+                links = listing.links
+            except OSError:
+                pass
+        self._links[directory] = links
+        return links
+
+
+def relative_paths2absolute(
+        paths: Iterable[Path],
+        relative_to=None,
+        *,
+        resolution: PathResolution = PathResolution.RESOLVE,
+        link_free_prefixes: Sequence[str] = (),
+        listings: Optional[MutableMapping[str, DirectoryListing]] = None
+) -> Sequence[Path]:
+    """
+    relative_path2absoluteの一括版。解決済みのディレクトリの接頭辞をパス間で使い回す(PathResolver)。
+
+    Args:
+        paths(Iterable[pathlib.Path]): パス
+        relative_to(p.Path, optional): 相対パスの起点。デフォルトはrelative_path2absoluteと同じ
+        resolution(PathResolution, optional): 絶対パス化の方法 (default: PathResolution.RESOLVE)
+        link_free_prefixes(Sequence[str], optional): リンクを探さないディレクトリ (default: ())
+        listings(Optional[MutableMapping[str, DirectoryListing]], optional): 一括処理をまたいで使い回す
+                                                                             リンク一覧 (default: None)
+
+    Returns:
+        絶対パスに変換したパス(Sequence[pathlib.Path])
+    """
+    resolver: PathResolver = PathResolver(relative_to, resolution=resolution, link_free_prefixes=link_free_prefixes,
+                                          listings=listings)
+    return tuple(resolver.resolve(path) for path in paths)
+
+
+def logical_current_directory() -> Path:
+    """
+    カレントディレクトリ。シェルが設定する$PWDが"."と同じディレクトリを指すなら、シンボリックリンクを含む$PWDを返す。
+    要素ごとのstatはしない。
+    Returns:
+        カレントディレクトリ(pathlib.Path)
+    Raises:
+        OSError: カレントディレクトリにアクセスできない
+    """
+    working_directory: str = os.environ.get("PWD", "")
+    if os.path.isabs(working_directory) and os.path.normpath(working_directory) == working_directory:
+        try:
+            if os.path.samestat(os.stat(working_directory), os.stat(".")):
+                return Path(working_directory)
+        except OSError:
+            pass
+    return Path(os.getcwd())
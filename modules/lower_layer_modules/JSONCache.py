@@ -0,0 +1,148 @@
+"""
+JSONCacheモジュール: プロセスで共有する、読んだJSONファイルのキャッシュ
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Mapping, NamedTuple, Optional, Union
+
+from .Caches import CacheInfo, LRUCache
+from .Exceptions import DataReadError
+from .FileSideEffects import read_json
+from .FrozenJSON import json_size
+
+DEFAULT_JSON_CACHE_MAX_ENTRIES: int = 256
+DEFAULT_JSON_CACHE_MAX_BYTES: int = 256 << 20
+
+# キャッシュのキー: 実パス、エンコーディング、読んだ位置(selectでなければNone)
+JSONCacheKey = tuple[str, str, Optional[tuple[str, ...]]]
+
+
+class FileSignature(NamedTuple):
+    """
+    ファイルが読んだときから変わっていないことを確かめる、statの値
+    """
+    mtime_ns: int
+    size: int
+    inode: int
+
+
+class JSONCacheEntry(NamedTuple):
+    """
+    キャッシュされた、変更できないJSON辞書と、読んだときのファイルのstat
+    """
+    signature: FileSignature
+    json_dict: Mapping[str, Any]
+
+
+class JSONFileCache:
+    """
+    読んだJSONファイルを、深く変更できない(read_jsonのfrozen)JSON辞書としてキャッシュする。
+    ファイルは(実パス, st_mtime_ns, st_size, inode)で識別し、呼び出しごとに1回statして、変わっていれば読み直す。
+    mtimeの分解能の内に、大きさを変えずに同じinodeへ書き直されたファイルは見分けられないので、invalidateで捨てる。
+    エントリ数と、メモリ使用量の見積もり(json_size)の合計に上限があり、最も古く使われたエントリから捨てる。
+    返すJSON辞書は変更できないので、全ての呼び出し元とスレッドで、コピーせずに共有してよい。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_JSON_CACHE_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_JSON_CACHE_MAX_BYTES):
+        """
+        Args:
+            max_entries(int, optional): 最大エントリ数 (default: 256)
+            max_bytes(int, optional): メモリ使用量の見積もりの合計の上限。これを超える1つのファイルはキャッシュしない
+                                      (default: 256 MiB)
+        Raises:
+            UsageError: 上限が正でない
+        """
+        self._cache: LRUCache[JSONCacheKey, JSONCacheEntry] = LRUCache(
+            max_entries, max_weight=max_bytes, weigh=lambda entry: json_size(entry.json_dict))
+
+    def read(self, json_file: Path, *, encoding="utf-8", select: Optional[Iterable[str]] = None) -> Mapping[str, Any]:
+        """
+        JSONファイルを読み出す。キャッシュにあって、ファイルが変わっていなければ、読まずに返す。
+        Args:
+            json_file(pathlib.Path): JSONファイル
+            encoding(str, optional): テキストエンコーディング (default: "utf-8")
+            select(Optional[Iterable[str]], optional): 読む値の位置。read_jsonのselect (default: None、全体を読む)
+        Returns:
+            変更できないJSON辞書(Mapping[str, Any])
+        Raises:
+            UsageError: selectの位置の書き方が正しくない
+            DataReadError: ファイルがない、またはJSONパース失敗
+        """
+        try:
+            stat: os.stat_result = os.stat(json_file)
+            path: str = os.path.realpath(json_file)
+        except OSError as err:
+            raise DataReadError(f"data readout of JSON file {json_file} failed."
+                                f" (message: {err.args},"
+                                f" {JSONFileCache.read.__name__} in module {__name__})")
+        signature: FileSignature = FileSignature(stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        selected: Optional[tuple[str, ...]] = None if select is None else tuple(select)
+        return self._cache.get_or_compute(
+            (path, encoding, selected),
+            lambda: JSONCacheEntry(signature, read_json(Path(path), encoding=encoding, select=selected, frozen=True)),
+            lambda entry: entry.signature == signature).json_dict
+
+    def invalidate(self, json_file: Optional[Union[Path, str]] = None) -> int:
+        """
+        キャッシュを捨てる。統計情報は変えない。
+        Args:
+            json_file(Optional[Union[pathlib.Path, str]], optional): このファイルのエントリだけを捨てる (default: None、全て)
+        Returns:
+            捨てたエントリ数(int)
+        """
+        if json_file is None:
+            return self._cache.invalidate(lambda key: True)
+        path: str = os.path.realpath(json_file)
+        return self._cache.invalidate(lambda key: key[0] == path)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        統計情報。current_weightはメモリ使用量の見積もりの合計(バイト)
+        Returns:
+            統計情報(CacheInfo)
+        """
+        return self._cache.cache_info()
+
+    def cache_clear(self) -> None:
+        """
+        全エントリと統計情報を消去する
+        """
+        self._cache.cache_clear()
+
+
+DEFAULT_JSON_CACHE_LOCK: threading.Lock = threading.Lock()
+default_json_cache_instance: Optional[JSONFileCache] = None
+
+
+def default_json_cache() -> JSONFileCache:
+    """
+    プロセスで共有するJSONファイルのキャッシュ。初回の呼び出しで作る。
+    Returns:
+        キャッシュ(JSONFileCache)
+    """
+    global default_json_cache_instance
+    if default_json_cache_instance is None:
+        with DEFAULT_JSON_CACHE_LOCK:
+            if default_json_cache_instance is None:
+                default_json_cache_instance = JSONFileCache()
+    return default_json_cache_instance
+
+
+def cached_read_json(json_file: Path, *, encoding="utf-8", select: Optional[Iterable[str]] = None) -> Mapping[str, Any]:
+    """
+    プロセスで共有するキャッシュを通してJSONファイルを読み出す(JSONFileCache.read)
+    Args:
+        json_file(pathlib.Path): JSONファイル
+        encoding(str, optional): テキストエンコーディング (default: "utf-8")
+        select(Optional[Iterable[str]], optional): 読む値の位置。read_jsonのselect (default: None、全体を読む)
+    Returns:
+        変更できないJSON辞書(Mapping[str, Any])
+    Raises:
+        UsageError: selectの位置の書き方が正しくない
+        DataReadError: ファイルがない、またはJSONパース失敗
+    """
+    return default_json_cache().read(json_file, encoding=encoding, select=select)
@@ -0,0 +1,571 @@
+"""
+JSONStreamsモジュール: JSONのバイト列を固定サイズのチャンクごとに読み進める、メモリ使用量が一定のJSONの走査
+"""
+from __future__ import annotations
+
+import codecs
+import functools
+import json
+import re
+from typing import Any, BinaryIO, Container, Iterable, Iterator, Optional, Union
+
+from .Exceptions import DataReadError, UsageError
+
+# JSONの中の位置。strはオブジェクトのキー、Noneは配列の全要素([*])
+JSONPath = tuple[Optional[str], ...]
+# 字句の種類、開始位置、終了位置。位置はストリーム先頭からの文字数
+Token = tuple[int, int, int]
+
+DEFAULT_CHUNK_SIZE: int = 1 << 16
+
+# 正規表現の部品。所有量指定子(++, *+)で後戻りしないので、閉じていない文字列などで照合に失敗しても線形時間で終わる
+_WHITESPACE: str = r'[ \t\r\n]*+'
+_STRING_PATTERN: str = r'"(?:[^"\\]++|\\.)*+"'
+_SCALAR_PATTERN: str = r'[^ \t\r\n\[\]{},:"]++'
+
+
+def _nested_pattern(depth: int) -> str:
+    """
+    入れ子の深さがdepth以下の、括弧の対応した配列かオブジェクトの正規表現
+    """
+    nested: str = f'|{_nested_pattern(depth - 1)}' if depth > 1 else ''
+    inner: str = rf'(?:[^"\[\]{{}}]++|{_STRING_PATTERN}{nested})*+'
+    return rf'(?:\[{inner}\]|\{{{inner}\}})'
+
+
+# 浅い部分木は、この正規表現の1回の照合で読み飛ばす
+_SHALLOW_PATTERN: str = _nested_pattern(3)
+# 空白を読み飛ばして、次の字句(1: 文字列, 2: 構造文字, 3: 数値やtrueなどのスカラー, 4: 閉じていない文字列の開始)
+# を読む。どれにも当たらなければバッファの終わり
+_TOKEN: re.Pattern[str] = re.compile(
+    rf'{_WHITESPACE}(?:({_STRING_PATTERN})|([\[\]{{}},:])|({_SCALAR_PATTERN})|(")|\Z)', re.DOTALL)
+# 値の後の区切りとキーの後の":"
+_SEPARATOR: re.Pattern[str] = re.compile(rf'{_WHITESPACE}([,:\]}}])')
+# 部分木の読み飛ばしで、文字列、浅い部分木とそれ以外の文字を読み飛ばして、次の括弧(1: 開き括弧, 2: 閉じ括弧)
+# または閉じていない文字列の開始(3)まで進む。どれにも当たらなければバッファの終わり
+_SKIP: re.Pattern[str] = re.compile(
+    rf'(?:[^"\[\]{{}}]++|{_STRING_PATTERN}|{_SHALLOW_PATTERN})*+(?:([\[{{])|([\]}}])|(")|\Z)', re.DOTALL)
+# オブジェクトのメンバー1つ(1: キー, 2: 文字列、スカラーか浅い部分木の値, 3: 後の区切り, 4: 深い部分木の値の開き括弧)と
+# 配列の要素1つ(1: 文字列かスカラーの値, 2: 後の区切り, 3: 開き括弧)を、1回の照合で読む速い経路。
+# 照合できなければ(チャンクの境目や文法の誤りでは)、tokenで1字句ずつ読む
+_MEMBER: re.Pattern[str] = re.compile(
+    rf'{_WHITESPACE}({_STRING_PATTERN}){_WHITESPACE}:{_WHITESPACE}'
+    rf'(?:({_STRING_PATTERN}|{_SCALAR_PATTERN}|{_SHALLOW_PATTERN}){_WHITESPACE}([,}}])|([\[{{]))', re.DOTALL)
+# メンバーを読むキーが決まっているときの_MEMBERで、先頭の、ほかのキーで値が浅いメンバーの並びを1回の照合で読み飛ばす。
+# エスケープを含むキーはここでは読み飛ばさない
+_MEMBER_PATTERN: str = _MEMBER.pattern
+_ELEMENT: re.Pattern[str] = re.compile(
+    rf'{_WHITESPACE}(?:({_STRING_PATTERN}|{_SCALAR_PATTERN}){_WHITESPACE}([,\]])|([\[{{]))', re.DOTALL)
+
+
+@functools.lru_cache(maxsize=256)
+def _members_skipping(keys: frozenset[str]) -> re.Pattern[str]:
+    """
+    Args:
+        keys(frozenset[str]): 読むキー
+    Returns:
+        読まないメンバーを読み飛ばしてから、メンバーを1つ読む正規表現(re.Pattern[str])
+    """
+    selected: str = "|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True)) or "(?!)"
+    skipped: str = (rf'{_WHITESPACE}"(?!(?:{selected})")[^"\\]*+"{_WHITESPACE}:{_WHITESPACE}'
+                    rf'(?:{_STRING_PATTERN}|{_SCALAR_PATTERN}|{_SHALLOW_PATTERN}){_WHITESPACE},')
+    return re.compile(rf'(?:{skipped})*+{_MEMBER_PATTERN}', re.DOTALL)
+
+
+_JSON_PATH: re.Pattern[str] = re.compile(r"(?:[^.\[\]]+|\[\*\])(?:\.[^.\[\]]+|\[\*\])*")
+_JSON_PATH_STEP: re.Pattern[str] = re.compile(r"\[\*\]|[^.\[\]]+")
+_CLOSING: dict[str, str] = {"[": "]", "{": "}"}
+_STRING, _PUNCTUATION, _SCALAR, _OPEN_STRING = 1, 2, 3, 4
+
+
+def parse_json_path(path: Union[str, JSONPath]) -> JSONPath:
+    """
+    "meta.version"や"items[*].id"の形のJSONの中の位置を解釈する。""は文書全体、"[*]"は最上位の配列の全要素。
+    キーに"."、"["、"]"を含む位置は書けない。
+    Args:
+        path(Union[str, JSONPath]): 位置。解釈済みならそのまま返す
+    Returns:
+        位置(JSONPath)
+    Raises:
+        UsageError: 位置の書き方が正しくない
+    """
+    if isinstance(path, tuple):
+        return path
+    if not path:
+        return ()
+    if _JSON_PATH.fullmatch(path) is None:
+        raise UsageError(f"The JSON path {path!r} is not like 'meta.version' or 'items[*].id'."
+                         f" ({parse_json_path.__name__} in module {__name__})")
+    return tuple(None if step == "[*]" else step for step in _JSON_PATH_STEP.findall(path))
+
+
+class JSONStreamReader:
+    """
+    バイナリストリームのJSONを、チャンクごとに復号して字句単位で読み進める。読み終えた部分は捨てるので、
+    バッファはチャンクサイズと、取り出し中の値1つ分の大きさに収まる。
+    字句の位置はストリーム先頭からの文字数で、エラーメッセージではバイト数に直す。
+    """
+
+    def __init__(self, stream: BinaryIO, *, name: str = "<stream>", encoding: str = "utf-8",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            stream(BinaryIO): 読み出すストリーム
+            name(str, optional): エラーメッセージでのストリームの名前 (default: "<stream>")
+            encoding(str, optional): テキストエンコーディング (default: "utf-8")
+            chunk_size(int, optional): 一度に読むバイト数 (default: 65536)
+        """
+        self.name: str = name
+        self.encoding: str = encoding
+        self._stream: BinaryIO = stream
+        self._chunk_size: int = chunk_size
+        self._decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(encoding)()
+        self._json_decoder: json.JSONDecoder = json.JSONDecoder()
+        self._buffer: str = ""
+        self._base: int = 0
+        self._base_bytes: int = 0
+        self._read_bytes: int = 0
+        self._position: int = 0
+        self._mark: Optional[int] = None
+        self._eof: bool = False
+
+    def byte_offset(self, offset: int) -> int:
+        """
+        バッファに残っている位置の、ストリーム先頭からのバイト数
+        Args:
+            offset(int): 位置(文字数)
+        Returns:
+            バイト数(int)
+        """
+        return self._base_bytes + len(self._buffer[:offset - self._base].encode(self.encoding))
+
+    def error(self, reason: str, offset: Optional[int] = None) -> DataReadError:
+        """
+        バイト位置つきの読み出しエラー
+        Args:
+            reason(str): 理由
+            offset(Optional[int], optional): 位置(文字数) (default: 次に読む位置)
+        Returns:
+            エラー(DataReadError)
+        """
+        byte_offset: int = self.byte_offset(self._base + self._position if offset is None else offset)
+        return DataReadError(f"data readout of JSON {self.name} failed at byte {byte_offset}: {reason}."
+                             f" ({JSONStreamReader.__name__} in module {__name__})")
+
+    def _fill(self) -> None:
+        """
+        次のチャンクを読んで復号する。閉じていない字句を読み直すときに二乗の時間にならないよう、
+        読む量はバッファの残りと同じだけ増やす。
+        Raises:
+            DataReadError: ストリームの読み出し失敗、または復号失敗
+        """
+        keep: int = self._position if self._mark is None else self._mark - self._base
+        try:
+            chunk: bytes = self._stream.read(max(self._chunk_size, len(self._buffer) - keep))
+            text: str = self._decoder.decode(chunk, final=not chunk)
+        except OSError as err:
+            raise self.error(f"reading failed (message: {err.args})")
+        except UnicodeDecodeError as err:
+            pending: int = len(self._decoder.getstate()[0])
+            raise DataReadError(f"data readout of JSON {self.name} failed at byte"
+                                f" {self._read_bytes - pending + err.start}: invalid {self.encoding}."
+                                f" ({JSONStreamReader.__name__} in module {__name__})")
+        self._read_bytes += len(chunk)
+        self._eof = not chunk
+        self._base_bytes += len(self._buffer[:keep].encode(self.encoding))
+        self._buffer = self._buffer[keep:] + text
+        self._base += keep
+        self._position -= keep
+
+    def token(self) -> Optional[Token]:
+        """
+        次の字句を読む
+        Returns:
+            字句の種類(_STRING, _PUNCTUATION, _SCALAR)、開始位置、終了位置(Token)。ストリームの終わりならNone
+        Raises:
+            DataReadError: 文字列が閉じていない、またはストリームの読み出し失敗
+        """
+        while True:
+            match: re.Match[str] = _TOKEN.match(self._buffer, self._position)
+            kind: Optional[int] = match.lastindex
+            if kind is None or kind == _OPEN_STRING or (kind == _SCALAR and match.end() == len(self._buffer)):
+                if not self._eof:
+                    self._position = match.start() if kind is None else match.start(kind)
+                    self._fill()
+                    continue
+                if kind is None:
+                    self._position = match.end()
+                    return None
+                if kind == _OPEN_STRING:
+                    raise self.error("unterminated string", self._base + match.start(kind))
+            self._position = match.end()
+            return kind, self._base + match.start(kind), self._base + match.end()
+
+    def text(self, token: Token) -> str:
+        """
+        バッファに残っている字句の文字列
+        Args:
+            token(Token): tokenが返した字句
+        Returns:
+            文字列(str)
+        """
+        return self._buffer[token[1] - self._base:token[2] - self._base]
+
+    def punctuation(self, token: Optional[Token]) -> str:
+        """
+        Args:
+            token(Optional[Token]): tokenが返した字句
+        Returns:
+            構造文字の字句ならその文字、ほかは""(str)
+        """
+        return self._buffer[token[1] - self._base] if token is not None and token[0] == _PUNCTUATION else ""
+
+    def expect(self, *expected: str) -> str:
+        """
+        次の字句が構造文字のどれかであることを確かめて読む
+        Args:
+            expected(str): 許す構造文字
+        Returns:
+            読んだ構造文字(str)
+        Raises:
+            DataReadError: 別の字句があった
+        """
+        match: Optional[re.Match[str]] = _SEPARATOR.match(self._buffer, self._position)
+        if match is not None and match.group(1) in expected:
+            self._position = match.end()
+            return match.group(1)
+        token: Optional[Token] = self.token()
+        punctuation: str = self.punctuation(token)
+        if punctuation not in expected:
+            raise self.error(f"expected {' or '.join(repr(p) for p in expected)}",
+                             None if token is None else token[1])
+        return punctuation
+
+    def key(self, token: Optional[Token]) -> str:
+        """
+        オブジェクトのキーの字句を読む
+        Args:
+            token(Optional[Token]): tokenが返した字句
+        Returns:
+            キー(str)
+        Raises:
+            DataReadError: 文字列でない
+        """
+        if token is None or token[0] != _STRING:
+            raise self.error("expected a key string", None if token is None else token[1])
+        contents: str = self.text(token)
+        return contents[1:-1] if "\\" not in contents else self._loads(token[1], contents)
+
+    def members(self, keys: Optional[Container[str]] = None) -> Iterator[tuple[str, Token]]:
+        """
+        "{"を読んだ後で、オブジェクトのメンバーを順に読む。呼び出し側は、次のメンバーに進む前に値を
+        value、skipなどで読み終えなければならない
+        Args:
+            keys(Optional[Container[str]], optional): 読むキー。ほかのメンバーは読み飛ばす (default: None、全て)
+        Returns:
+            キーと値の最初の字句のイテレータ(Iterator[tuple[str, Token]])
+        Raises:
+            DataReadError: オブジェクトが正しくない
+        """
+        pattern: re.Pattern[str] = _MEMBER if keys is None \
+            else _members_skipping(frozenset(key for key in keys if key is not None))
+        first: bool = True
+        while True:
+            match: Optional[re.Match[str]] = pattern.match(self._buffer, self._position)
+            if match is not None:
+                contents: str = match.group(1)
+                key: str = contents[1:-1] if "\\" not in contents \
+                    else self._loads(self._base + match.start(1), contents)
+                self._position = match.end()
+                if match.lastindex == 4:
+                    token: Token = (_PUNCTUATION, self._base + match.start(4), self._base + match.end(4))
+                    if keys is None or key in keys:
+                        yield key, token
+                    else:
+                        self.skip(token)
+                    separator: str = self.expect(",", "}")
+                else:
+                    separator = match.group(3)
+                    if keys is None or key in keys:
+                        start: int = match.start(2)
+                        opening: str = self._buffer[start]
+                        if opening in _CLOSING:
+                            self._position = start + 1
+                            yield key, (_PUNCTUATION, self._base + start, self._base + start + 1)
+                            separator = self.expect(",", "}")
+                        else:
+                            yield key, (_STRING if opening == '"' else _SCALAR,
+                                        self._base + start, self._base + match.end(2))
+            else:
+                token = self.token()
+                if first and self.punctuation(token) == "}":
+                    return
+                key = self.key(token)
+                self.expect(":")
+                value: Optional[Token] = self.token()
+                if value is None:
+                    raise self.error("unexpected end")
+                if keys is None or key in keys:
+                    yield key, value
+                else:
+                    self.skip(value)
+                separator = self.expect(",", "}")
+            if separator == "}":
+                return
+            first = False
+
+    def elements(self) -> Iterator[Token]:
+        """
+        "["を読んだ後で、配列の要素を順に読む。呼び出し側は、次の要素に進む前に要素を
+        value、skipなどで読み終えなければならない
+        Returns:
+            要素の最初の字句のイテレータ(Iterator[Token])
+        Raises:
+            DataReadError: 配列が正しくない
+        """
+        first: bool = True
+        while True:
+            match: Optional[re.Match[str]] = _ELEMENT.match(self._buffer, self._position)
+            if match is not None:
+                self._position = match.end()
+                if match.lastindex == 3:
+                    yield _PUNCTUATION, self._base + match.start(3), self._base + match.end(3)
+                    separator: str = self.expect(",", "]")
+                else:
+                    separator = match.group(2)
+                    yield (_STRING if match.group(1)[0] == '"' else _SCALAR,
+                           self._base + match.start(1), self._base + match.end(1))
+            else:
+                token: Optional[Token] = self.token()
+                if first and self.punctuation(token) == "]":
+                    return
+                if token is None:
+                    raise self.error("unexpected end")
+                yield token
+                separator = self.expect(",", "]")
+            if separator == "]":
+                return
+            first = False
+
+    def skip(self, token: Optional[Token]) -> None:
+        """
+        字句から始まる値を、Pythonのオブジェクトを作らずに読み飛ばす。
+        括弧の対応と文字列の閉じだけを確かめ、部分木の中の文法は確かめない。
+        Args:
+            token(Optional[Token]): 値の最初の字句
+        Raises:
+            DataReadError: 値でない、括弧が対応しない、または文字列が閉じていない
+        """
+        if token is None:
+            raise self.error("unexpected end")
+        if token[0] != _PUNCTUATION:
+            return
+        opening: str = self.punctuation(token)
+        if opening not in _CLOSING:
+            raise self.error(f"unexpected {opening!r}", token[1])
+        closings: list[str] = [_CLOSING[opening]]
+        while closings:
+            match: re.Match[str] = _SKIP.match(self._buffer, self._position)
+            kind: Optional[int] = match.lastindex
+            if kind is None or kind == 3:
+                if self._eof:
+                    raise self.error("unexpected end" if kind is None else "unterminated string",
+                                     self._base + (match.end() if kind is None else match.start(kind)))
+                self._position = match.end() if kind is None else match.start(kind)
+                self._fill()
+                continue
+            self._position = match.end()
+            bracket: str = self._buffer[match.start(kind)]
+            if kind == 1:
+                closings.append(_CLOSING[bracket])
+            elif bracket != closings.pop():
+                raise self.error(f"mismatched {bracket!r}", self._base + match.start(kind))
+
+    def value(self, token: Optional[Token]) -> Any:
+        """
+        字句から始まる値を読んでPythonのオブジェクトにする。
+        バッファに収まっている値は、読み飛ばさずにjsonのCの走査でそのまま読む。
+        Args:
+            token(Optional[Token]): 値の最初の字句
+        Returns:
+            値(Any)
+        Raises:
+            DataReadError: 値が正しいJSONでない
+        """
+        if token is None:
+            raise self.error("unexpected end")
+        if token[0] != _PUNCTUATION:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, token[1] - self._base)
+            except json.JSONDecodeError as err:
+                raise self.error(err.msg, self._base + err.pos)
+            if end != token[2] - self._base:
+                raise self.error("invalid value", token[1])
+            return value
+        start: int = token[1] - self._base
+        try:
+            value, end = self._json_decoder.raw_decode(self._buffer, start)
+        except json.JSONDecodeError:
+            # バッファで途切れているか、本当に正しくない。値の終わりまで読んでから、もう一度読む
+            self._mark = token[1]
+            try:
+                self.skip(token)
+            finally:
+                self._mark = None
+            start = token[1] - self._base
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, start)
+            except json.JSONDecodeError as err:
+                raise self.error(err.msg, self._base + err.pos)
+        self._position = end
+        return value
+
+    def _loads(self, offset: int, contents: str) -> Any:
+        try:
+            return json.loads(contents)
+        except json.JSONDecodeError as err:
+            raise self.error(err.msg, offset + err.pos)
+
+    def end(self) -> None:
+        """
+        文書の後に空白しかないことを確かめる
+        Raises:
+            DataReadError: 余分なデータがある
+        """
+        token: Optional[Token] = self.token()
+        if token is not None:
+            raise self.error("extra data", token[1])
+
+
+def iter_json_values(
+        stream: BinaryIO,
+        path: Union[str, JSONPath] = "[*]",
+        *,
+        name: str = "<stream>",
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    ストリームのJSONの、位置にある値を1つずつ読んで返す。位置にない部分木はオブジェクトを作らずに読み飛ばす。
+    メモリ使用量はチャンクサイズと、返す値1つ分の大きさに収まる。
+    読み飛ばす部分木は括弧の対応と文字列の閉じだけを確かめるので、その中の文法の誤り(区切りの抜けや重複、
+    正しくないスカラーなど)は検出しない。
+    Args:
+        stream(BinaryIO): 読み出すストリーム
+        path(Union[str, JSONPath], optional): 値の位置。"[*]"は最上位の配列の要素 (default: "[*]")
+        name(str, optional): エラーメッセージでのストリームの名前 (default: "<stream>")
+        encoding(str, optional): テキストエンコーディング (default: "utf-8")
+        chunk_size(int, optional): 一度に読むバイト数 (default: 65536)
+    Returns:
+        値のイテレータ(Iterator[Any])
+    Raises:
+        UsageError: 位置の書き方が正しくない
+        DataReadError: JSONパース失敗(読み飛ばす部分木の中を除く)。メッセージにバイト位置を含む
+    """
+    steps: JSONPath = parse_json_path(path)
+    reader: JSONStreamReader = JSONStreamReader(stream, name=name, encoding=encoding, chunk_size=chunk_size)
+    token: Optional[Token] = reader.token()
+    if token is None:
+        raise reader.error("no JSON value")
+    yield from _values_at(reader, token, steps)
+    reader.end()
+
+
+def _values_at(reader: JSONStreamReader, token: Token, steps: JSONPath) -> Iterator[Any]:
+    if not steps:
+        yield reader.value(token)
+    elif steps[0] is None and reader.punctuation(token) == "[":
+        for element in reader.elements():
+            yield from _values_at(reader, element, steps[1:])
+    elif steps[0] is not None and reader.punctuation(token) == "{":
+        for _, value in reader.members(steps[:1]):
+            yield from _values_at(reader, value, steps[1:])
+    else:
+        reader.skip(token)
+
+
+# 射影木: キー(配列の全要素はNone)から、その下の射影木への辞書。Noneは値全体
+Projection = Optional[dict[Optional[str], "Projection"]]
+_MISSING: object = object()
+
+
+def projection(paths: Iterable[Union[str, JSONPath]]) -> Projection:
+    """
+    位置の集まりを射影木にする。ほかの位置の中にある位置は、外側の位置にまとめる。
+    Args:
+        paths(Iterable[Union[str, JSONPath]]): 位置
+    Returns:
+        射影木(Projection)
+    Raises:
+        UsageError: 位置の書き方が正しくない
+    """
+    tree: dict[Optional[str], Projection] = {}
+    for steps in map(parse_json_path, paths):
+        if not steps:
+            return None
+        node: Projection = tree
+        for step in steps[:-1]:
+            node = node.setdefault(step, {})
+            if node is None:
+                break
+        else:
+            node[steps[-1]] = None
+    return tree
+
+
+def project_json(
+        stream: BinaryIO,
+        paths: Iterable[Union[str, JSONPath]],
+        *,
+        name: str = "<stream>",
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Any:
+    """
+    ストリームのJSONの、位置にある値だけを、元の入れ子の形のまま読む。位置にない部分木はオブジェクトを作らずに
+    読み飛ばす。射影の型(オブジェクトか配列か)に合わない値は、キーと同じく結果から省く。
+    例えば["meta.version", "items[*].id"]では{"meta": {"version": 3}, "items": [{"id": 1}, {"id": 2}]}になる。
+    読み飛ばす部分木の中の文法の誤りは検出しない(iter_json_valuesと同じ)。
+    Args:
+        stream(BinaryIO): 読み出すストリーム
+        paths(Iterable[Union[str, JSONPath]]): 値の位置
+        name(str, optional): エラーメッセージでのストリームの名前 (default: "<stream>")
+        encoding(str, optional): テキストエンコーディング (default: "utf-8")
+        chunk_size(int, optional): 一度に読むバイト数 (default: 65536)
+    Returns:
+        射影した値(Any)。文書全体が射影に合わなければNone
+    Raises:
+        UsageError: 位置の書き方が正しくない
+        DataReadError: JSONパース失敗(読み飛ばす部分木の中を除く)。メッセージにバイト位置を含む
+    """
+    tree: Projection = projection(paths)
+    reader: JSONStreamReader = JSONStreamReader(stream, name=name, encoding=encoding, chunk_size=chunk_size)
+    token: Optional[Token] = reader.token()
+    if token is None:
+        raise reader.error("no JSON value")
+    projected: Any = _project(reader, token, tree)
+    reader.end()
+    return None if projected is _MISSING else projected
+
+
+def _project(reader: JSONStreamReader, token: Token, tree: Projection) -> Any:
+    if tree is None:
+        return reader.value(token)
+    opening: str = reader.punctuation(token)
+    if opening == "{" and (len(tree) > 1 or None not in tree):
+        members: dict[str, Any] = {}
+        for key, value in reader.members(tree):
+            projected: Any = _project(reader, value, tree[key])
+            if projected is not _MISSING:
+                members[key] = projected
+        return members
+    if opening == "[" and None in tree:
+        elements: list[Any] = []
+        element_tree: Projection = tree[None]
+        for element in reader.elements():
+            projected = _project(reader, element, element_tree)
+            if projected is not _MISSING:
+                elements.append(projected)
+        return elements
+    reader.skip(token)
+    return _MISSING
@@ -0,0 +1,338 @@
+"""
+Launchersモジュール: 外部プロセスの起動
+"""
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from enum import Enum
+from os import PathLike
+from pathlib import PureWindowsPath
+from typing import Mapping, NamedTuple, Optional, Sequence, Union
+
+from .Exceptions import ProcessError, UsageError
+
+Argument = Union[str, PathLike]
+
+# asyncio, subprocess, threadingは、exp.pyの起動を軽くするため、使う関数の中でimportする
+
+# WSL_INTEROPはWindowsの実行ファイルを起動するinteropソケットの場所なので、必ず引き継ぐ
+SPAWN_ENVIRONMENT_VARIABLES: tuple[str, ...] = ("PATH", "HOME", "LANG", "WSL_INTEROP", "WSL_DISTRO_NAME", "WSLENV")
+
+
+class LaunchMode(Enum):
+    """
+    起動方法。WAITは終了を待ち、DETACHは新しいセッションで起動して待たない。
+    """
+    WAIT = "wait"
+    DETACH = "detach"
+
+
+class Spawner(Enum):
+    """
+    プロセス生成の方法。POSIX_SPAWNはos.posix_spawnpを使い、fdの一括クローズをせず、最小限の環境変数だけを渡す。
+    """
+    SUBPROCESS = "subprocess"
+    POSIX_SPAWN = "posix_spawn"
+
+
+def spawn_environment(names: Sequence[str] = SPAWN_ENVIRONMENT_VARIABLES) -> Mapping[str, str]:
+    """
+    子プロセスに渡す最小限の環境変数
+    Args:
+        names(Sequence[str], optional): 引き継ぐ環境変数名 (default: SPAWN_ENVIRONMENT_VARIABLES)
+    Returns:
+        環境変数(Mapping[str, str])
+    """
+    return {name: os.environ[name] for name in names if name in os.environ}
+
+
+def launch(
+        command: Sequence[Argument],
+        mode: LaunchMode = LaunchMode.WAIT,
+        spawner: Spawner = Spawner.SUBPROCESS,
+        environment: Optional[Mapping[str, str]] = None
+) -> None:
+    """
+    コマンドを起動する。終了コードは見ない(explorer.exeは成功しても1を返す)。
+    DETACHでは、標準入出力を/dev/nullにつなぎ、新しいセッションで起動できた時点で戻る。
+    Args:
+        command(Sequence[Argument]): コマンドと引数
+        mode(LaunchMode, optional): 起動方法 (default: LaunchMode.WAIT)
+        spawner(Spawner, optional): プロセス生成の方法 (default: Spawner.SUBPROCESS)
+        environment(Optional[Mapping[str, str]], optional): POSIX_SPAWNで渡す環境変数 (default: spawn_environment())
+    Raises:
+        ProcessError: 起動失敗
+    """
+    if spawner is Spawner.POSIX_SPAWN:
+        posix_spawn_launch(command, mode, environment)
+        return
+    import subprocess
+    try:
+        if mode is LaunchMode.WAIT:
+            subprocess.run(command)
+            return
+        subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except (OSError, subprocess.SubprocessError) as err:
+        raise ProcessError(f"Launching {' '.join(str(argument) for argument in command)} failed."
+                           f" (message: {err.args}, {launch.__name__} in module {__name__})")
+
+
+def posix_spawn_launch(
+        command: Sequence[Argument],
+        mode: LaunchMode = LaunchMode.WAIT,
+        environment: Optional[Mapping[str, str]] = None
+) -> None:
+    """
+    os.posix_spawnpでコマンドを起動する。親プロセスのメモリが大きくてもforkのページテーブル複製がなく、
+    fdはO_CLOEXECに任せて一括クローズしない。DETACHの子プロセスはデーモンスレッドで回収する。
+    Args:
+        command(Sequence[Argument]): コマンドと引数
+        mode(LaunchMode, optional): 起動方法 (default: LaunchMode.WAIT)
+        environment(Optional[Mapping[str, str]], optional): 環境変数 (default: spawn_environment())
+    Raises:
+        ProcessError: 起動失敗
+    """
+    arguments: list[str] = [os.fspath(argument) for argument in command]
+    detach: bool = mode is LaunchMode.DETACH
+    file_actions: list[tuple] = [(os.POSIX_SPAWN_OPEN, descriptor, os.devnull, flags, 0)
+                                 for descriptor, flags in ((0, os.O_RDONLY), (1, os.O_WRONLY), (2, os.O_WRONLY))] \
+        if detach else []
+    try:
+        pid: int = os.posix_spawnp(arguments[0], arguments,
+                                   spawn_environment() if environment is None else environment,
+                                   file_actions=file_actions, setsid=detach)
+        if not detach:
+            os.waitpid(pid, 0)
+            return
+    except OSError as err:
+        raise ProcessError(f"Launching {' '.join(arguments)} failed."
+                           f" (message: {err.args}, {posix_spawn_launch.__name__} in module {__name__})")
+    import threading
+    threading.Thread(target=os.waitpid, args=(pid, 0), daemon=True).start()
+
+
+async def async_launch(
+        command: Sequence[Argument],
+        mode: LaunchMode = LaunchMode.WAIT,
+        timeout: Optional[float] = None
+) -> None:
+    """
+    asyncio.create_subprocess_execでコマンドを起動する、launchのasync版。イベントループをブロックしない。
+    WAITでtimeout秒以内に終わらないか、待っている間にタスクがキャンセルされたら、プロセスをkillする。
+    キャンセルは、asyncio.timeoutやTaskGroupが見分けられるように、asyncio.CancelledErrorのまま伝える。
+    Args:
+        command(Sequence[Argument]): コマンドと引数
+        mode(LaunchMode, optional): 起動方法 (default: LaunchMode.WAIT)
+        timeout(Optional[float], optional): WAITで終了を待つ秒数。Noneなら無制限 (default: None)
+    Raises:
+        ProcessError: 起動失敗、またはタイムアウト
+        asyncio.CancelledError: 起動や終了待ちの間のキャンセル
+    """
+    import asyncio
+    import subprocess
+    detach: bool = mode is LaunchMode.DETACH
+    described: str = " ".join(str(argument) for argument in command)
+    try:
+        process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(
+            *command, stdin=subprocess.DEVNULL if detach else None, stdout=subprocess.DEVNULL if detach else None,
+            stderr=subprocess.DEVNULL if detach else None, start_new_session=detach)
+    except OSError as err:
+        raise ProcessError(f"Launching {described} failed."
+                           f" (message: {err.args}, {async_launch.__name__} in module {__name__})")
+    if detach:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        await kill_process(process)
+        raise ProcessError(f"{described} did not exit in {timeout} s."
+                           f" ({async_launch.__name__} in module {__name__})")
+    except asyncio.CancelledError:
+        await kill_process(process)
+        raise
+
+
+async def kill_process(process: asyncio.subprocess.Process) -> None:
+    """
+    asyncioのプロセスをkillして回収する。既に終わっていれば何もしない。
+    Args:
+        process(asyncio.subprocess.Process): プロセス
+    """
+    import asyncio
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    await asyncio.shield(process.wait())
+
+
+class Launcher(ABC):
+    """
+    Windows側でパスを開く方法の抽象基本クラス。サブクラスはcommandで起動するコマンドを作る。
+    commandを実装しないサブクラスは、インスタンスを作るときにTypeErrorになる。
+    openとasync_openを上書きすれば、プロセスを起動しないランチャーにもできる(RecordingLauncher)。
+    """
+    name: str = ""
+
+    @abstractmethod
+    def command(self, windows_path: str, select: bool = False) -> Sequence[Argument]:
+        """
+        パスを開くコマンド
+        Args:
+            windows_path(str): Windowsパス
+            select(bool, optional): 親ディレクトリを開いてパスを選択する (default: False)
+        Returns:
+            コマンドと引数(Sequence[Argument])
+        Raises:
+            UsageError: このランチャーでは開けないパス
+        """
+
+    def open(
+            self,
+            windows_path: str,
+            *,
+            select: bool = False,
+            mode: LaunchMode = LaunchMode.WAIT,
+            spawner: Spawner = Spawner.SUBPROCESS
+    ) -> None:
+        """
+        パスを開く
+        Args:
+            windows_path(str): Windowsパス
+            select(bool, optional): 親ディレクトリを開いてパスを選択する (default: False)
+            mode(LaunchMode, optional): 起動方法 (default: LaunchMode.WAIT)
+            spawner(Spawner, optional): プロセス生成の方法 (default: Spawner.SUBPROCESS)
+        Raises:
+            UsageError: このランチャーでは開けないパス
+            ProcessError: 起動失敗
+        """
+        launch(self.command(windows_path, select), mode, spawner)
+
+    async def async_open(
+            self,
+            windows_path: str,
+            *,
+            select: bool = False,
+            mode: LaunchMode = LaunchMode.WAIT,
+            timeout: Optional[float] = None
+    ) -> None:
+        """
+        パスを開くopenのasync版
+        Args:
+            windows_path(str): Windowsパス
+            select(bool, optional): 親ディレクトリを開いてパスを選択する (default: False)
+            mode(LaunchMode, optional): 起動方法 (default: LaunchMode.WAIT)
+            timeout(Optional[float], optional): WAITで終了を待つ秒数 (default: None)
+        Raises:
+            UsageError: このランチャーでは開けないパス
+            ProcessError: 起動失敗、またはタイムアウト
+            asyncio.CancelledError: キャンセル
+        """
+        await async_launch(self.command(windows_path, select), mode, timeout)
+
+
+class ExplorerLauncher(Launcher):
+    """
+    explorer.exe <path>、または explorer.exe /select,<path>
+    """
+    name = "explorer"
+
+    def __init__(self, explorer: Argument = "explorer.exe"):
+        """
+        Args:
+            explorer(Argument, optional): explorer.exeのパス (default: "explorer.exe")
+        """
+        self.explorer: Argument = explorer
+
+    def command(self, windows_path: str, select: bool = False) -> Sequence[Argument]:
+        return [self.explorer, f"/select,{windows_path}" if select else windows_path]
+
+
+class WslviewLauncher(Launcher):
+    """
+    wslu の wslview <path>。既定のアプリケーションで開く。選択はできないので、selectでは親ディレクトリを開く。
+    """
+    name = "wslview"
+
+    def __init__(self, wslview: Argument = "wslview"):
+        """
+        Args:
+            wslview(Argument, optional): wslviewのパス (default: "wslview")
+        """
+        self.wslview: Argument = wslview
+
+    def command(self, windows_path: str, select: bool = False) -> Sequence[Argument]:
+        return [self.wslview, str(PureWindowsPath(windows_path).parent) if select else windows_path]
+
+
+class CmdStartLauncher(Launcher):
+    """
+    cmd.exe /c start "" <path>。既定のアプリケーションで開く。selectではstartでexplorer.exe /select,<path>を起動する。
+    WSLのinteropは空白を含まない引数をクォートしないので、cmd.exeの特殊文字を含むパスは開かない。
+    """
+    name = "cmd"
+    CMD_SPECIAL_CHARACTERS: str = "&|<>^%\""
+
+    def __init__(self, cmd: Argument = "cmd.exe"):
+        """
+        Args:
+            cmd(Argument, optional): cmd.exeのパス (default: "cmd.exe")
+        """
+        self.cmd: Argument = cmd
+
+    def command(self, windows_path: str, select: bool = False) -> Sequence[Argument]:
+        if any(character in windows_path for character in self.CMD_SPECIAL_CHARACTERS):
+            raise UsageError(f"The path {windows_path} has a special character of cmd.exe,"
+                             f" so it cannot be passed to start safely."
+                             f" ({CmdStartLauncher.__name__} in module {__name__})")
+        target: list[str] = ["explorer.exe", f"/select,{windows_path}"] if select else [windows_path]
+        return [self.cmd, "/c", "start", '""', *target]
+
+
+class LaunchRecord(NamedTuple):
+    """
+    RecordingLauncherが記録した起動要求
+    """
+    windows_path: str
+    select: bool
+    mode: LaunchMode
+
+
+class RecordingLauncher(Launcher):
+    """
+    プロセスを起動せず、起動要求をメモリに記録するだけのランチャー。Windowsのない環境でのテストと、
+    パスの解決から起動までの処理の性能測定に使う。スレッド間で共有してよい。
+    """
+    name = "record"
+
+    def __init__(self):
+        import threading
+        self.records: list[LaunchRecord] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def command(self, windows_path: str, select: bool = False) -> Sequence[Argument]:
+        return ExplorerLauncher().command(windows_path, select)
+
+    def open(
+            self,
+            windows_path: str,
+            *,
+            select: bool = False,
+            mode: LaunchMode = LaunchMode.WAIT,
+            spawner: Spawner = Spawner.SUBPROCESS
+    ) -> None:
+        with self._lock:
+            self.records.append(LaunchRecord(windows_path, select, mode))
+
+    async def async_open(
+            self,
+            windows_path: str,
+            *,
+            select: bool = False,
+            mode: LaunchMode = LaunchMode.WAIT,
+            timeout: Optional[float] = None
+    ) -> None:
+        self.open(windows_path, select=select, mode=mode)
@@ -0,0 +1,213 @@
+"""
+MountTableモジュール: /proc/self/mountinfoから作るdrvfsマウントポイント→Windowsパスの最長一致インデックス
+"""
+from __future__ import annotations
+
+import os
+import re
+import select
+import threading
+from pathlib import Path
+from typing import Mapping, NamedTuple, Optional, Sequence
+
+MOUNTINFO: Path = Path("/proc/self/mountinfo")
+WINDOWS_FILESYSTEM_TYPES: frozenset[str] = frozenset({"drvfs", "9p"})
+
+OCTAL_ESCAPE_PATTERN: re.Pattern = re.compile(r"\\([0-7]{3})")
+WINDOWS_ROOT_OPTION_PATTERN: re.Pattern = re.compile(r"(?:^|[;,])path=([A-Za-z]:[^;,]*|\\\\[^;,]+)")
+WINDOWS_DRIVE_SOURCE_PATTERN: re.Pattern = re.compile(r"^([A-Za-z]:(?:\\[^\\]+)*)\\?$")
+
+
+class DrvfsMount(NamedTuple):
+    """
+    Windowsのボリューム(の一部)をマウントしたマウントポイント
+    """
+    mount_point: str
+    windows_root: str
+
+
+def unescape_mountinfo_field(field: str) -> str:
+    """
+    mountinfoのフィールドの8進エスケープ(空白の\\040など)を戻す
+    Args:
+        field(str): フィールド
+    Returns:
+        エスケープを戻したフィールド(str)
+    """
+    return OCTAL_ESCAPE_PATTERN.sub(lambda matched: chr(int(matched.group(1), 8)), field)
+
+
+def parse_drvfs_mounts(mountinfo_text: str) -> Sequence[DrvfsMount]:
+    """
+    mountinfoの内容からWindowsのボリュームのマウントを取り出す。
+    bind mountされたWindowsのフォルダは、マウント元のフォルダ(rootフィールド)をWindowsパスに含める。
+    Args:
+        mountinfo_text(str): /proc/<pid>/mountinfoの内容
+    Returns:
+        マウントの列(Sequence[DrvfsMount])
+    """
+    mounts: list[DrvfsMount] = []
+    for line in mountinfo_text.splitlines():
+        fields: list[str] = line.split(" ")
+        try:
+            separator: int = fields.index("-", 6)
+            root, mount_point = fields[3], fields[4]
+            filesystem_type, source, super_options = fields[separator + 1: separator + 4]
+        except ValueError:
+            continue
+        if filesystem_type not in WINDOWS_FILESYSTEM_TYPES:
+            continue
+        windows_root: Optional[str] = windows_root_of_mount(unescape_mountinfo_field(source),
+                                                            unescape_mountinfo_field(super_options))
+        if windows_root is None:
+            continue
+        names: list[str] = [name for name in unescape_mountinfo_field(root).split("/") if name]
+        if names:
+            windows_root = windows_root.rstrip("\\") + "\\" + "\\".join(names)
+        mounts.append(DrvfsMount(mount_point=unescape_mountinfo_field(mount_point), windows_root=windows_root))
+    return tuple(mounts)
+
+
+def windows_root_of_mount(source: str, super_options: str) -> Optional[str]:
+    """
+    マウントのWindows側のルートパス。9pのdrvfsはオプションのpath=、WSL1のdrvfsはマウント元から得る。
+    Args:
+        source(str): マウント元
+        super_options(str): スーパーブロックのオプション
+    Returns:
+        Windowsパス(str)。Windowsのボリュームでなければ None
+    """
+    matched: Optional[re.Match] = WINDOWS_ROOT_OPTION_PATTERN.search(super_options)
+    if matched is not None:
+        windows_root: str = matched.group(1)
+    else:
+        matched = WINDOWS_DRIVE_SOURCE_PATTERN.match(source)
+        if matched is None:
+            return None
+        windows_root = matched.group(1)
+    if windows_root.endswith(":"):
+        windows_root += "\\"
+    return windows_root
+
+
+class DrvfsMountTable:
+    """
+    マウントポイント→Windowsパスの最長一致インデックス。
+    mountinfoはpoll(2)でマウントの変化を通知するので、変化があったときだけ読み直す。
+    """
+
+    def __init__(self, mountinfo: Path = MOUNTINFO):
+        """
+        Args:
+            mountinfo(pathlib.Path, optional): mountinfoファイル (default: /proc/self/mountinfo)
+        """
+        self._mountinfo: Path = mountinfo
+        self._lock: threading.Lock = threading.Lock()
+        self._index: Mapping[str, str] = {}
+        self._descriptor: Optional[int] = None
+        self._poller: Optional[select.poll] = None
+        try:
+            self._descriptor = os.open(mountinfo, os.O_RDONLY | os.O_CLOEXEC)
+            if hasattr(select, "poll"):
+                self._poller = select.poll()
+                self._poller.register(self._descriptor, select.POLLPRI | select.POLLERR)
+        except OSError:
+            return
+        self._reload()
+
+    def __del__(self):
+        if self._descriptor is not None:
+            os.close(self._descriptor)
+
+    @property
+    def mounts(self) -> Sequence[DrvfsMount]:
+        """
+        Returns:
+            現在のマウントの列(Sequence[DrvfsMount])
+        """
+        return tuple(DrvfsMount(mount_point, windows_root) for mount_point, windows_root in self._index.items())
+
+    def _reload(self) -> None:
+        """
+        mountinfoを読み直してインデックスを作り直す
+        """
+        chunks: list[bytes] = []
+        try:
+            os.lseek(self._descriptor, 0, os.SEEK_SET)
+            while chunk := os.read(self._descriptor, 65536):
+                chunks.append(chunk)
+        except OSError:
+            return
+        mounts: Sequence[DrvfsMount] = parse_drvfs_mounts(b"".join(chunks).decode("utf-8", errors="surrogateescape"))
+        self._index = {mount.mount_point: mount.windows_root for mount in mounts}
+
+    def refresh_if_changed(self) -> bool:
+        """
+        マウントが変化していればインデックスを作り直す
+        Returns:
+            作り直したら True
+        """
+        if self._poller is None:
+            return False
+        with self._lock:
+            if not self._poller.poll(0):
+                return False
+            self._reload()
+            return True
+
+    def mount_point_of(self, windows_root: str) -> Optional[str]:
+        """
+        Windowsパスをルートとするマウントポイント(例えば"C:\\"に対する"/mnt/c")
+        Args:
+            windows_root(str): Windowsパス
+        Returns:
+            マウントポイント(str)。なければ None
+        """
+        self.refresh_if_changed()
+        windows_root = windows_root.rstrip("\\").lower()
+        for mount_point, root in self._index.items():
+            if root.rstrip("\\").lower() == windows_root:
+                return mount_point
+        return None
+
+    def lookup(self, posix_path: str) -> Optional[str]:
+        """
+        最長一致するマウントポイントからWindowsパスを作る
+        Args:
+            posix_path(str): 正規化済みの絶対パス文字列
+        Returns:
+            Windowsパス(str)。Windowsのボリューム上になければ None
+        """
+        self.refresh_if_changed()
+        index: Mapping[str, str] = self._index
+        if not index or not posix_path.startswith("/"):
+            return None
+        prefix: str = posix_path
+        while True:
+            windows_root: Optional[str] = index.get(prefix)
+            if windows_root is not None:
+                rest: str = posix_path[len(prefix):].strip("/")
+                if not rest:
+                    return windows_root
+                return windows_root.rstrip("\\") + "\\" + rest.replace("/", "\\")
+            if prefix == "/":
+                return None
+            prefix = prefix[:prefix.rfind("/")] or "/"
+
+
+DEFAULT_MOUNT_TABLE_LOCK: threading.Lock = threading.Lock()
+default_mount_table_instance: Optional[DrvfsMountTable] = None
+
+
+def default_mount_table() -> DrvfsMountTable:
+    """
+    プロセスで共有する/proc/self/mountinfoのインデックス。初回の呼び出しで作る。
+    Returns:
+        インデックス(DrvfsMountTable)
+    """
+    global default_mount_table_instance
+    if default_mount_table_instance is None:
+        with DEFAULT_MOUNT_TABLE_LOCK:
+            if default_mount_table_instance is None:
+                default_mount_table_instance = DrvfsMountTable()
+    return default_mount_table_instance
@@ -0,0 +1,113 @@
+"""
+Profilingモジュール: 処理段階ごとの所要時間の計測
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Mapping, NamedTuple, TypeVar
+
+R = TypeVar("R")
+
+
+class Span(NamedTuple):
+    """
+    ある名前の区間の集計
+    """
+    calls: int
+    seconds: float
+    max_seconds: float
+
+
+def default_telemetry_file() -> Path:
+    """
+    テレメトリファイルのデフォルトの場所 ($XDG_STATE_HOME/exp/telemetry.jsonl、なければ~/.local/state/exp/telemetry.jsonl)
+    Returns:
+        テレメトリファイル(pathlib.Path)
+    """
+    state_directory: str | None = os.environ.get("XDG_STATE_HOME")
+    if state_directory:
+        return Path(state_directory) / "exp" / "telemetry.jsonl"
+    return Path.home() / ".local" / "state" / "exp" / "telemetry.jsonl"
+
+
+class PhaseTimer:
+    """
+    名前付きの区間の呼び出し回数、合計時間、最大時間を集計する。スレッド間で共有してよい。
+    計測しないときはPhaseTimerを作らず、呼び出し側がNoneかどうかだけを見るので、余計な処理は一切ない。
+    """
+
+    def __init__(self):
+        self.started: float = time.perf_counter()
+        self._spans: dict[str, Span] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def call(self, name: str, function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """
+        関数を呼び出し、その所要時間を名前の区間に加える。例外で終わった呼び出しも加える。
+        Args:
+            name(str): 区間の名前
+            function(Callable[..., R]): 関数
+            args(Any): 位置引数
+            kwargs(Any): キーワード引数
+        Returns:
+            関数の戻り値(R)
+        """
+        started: float = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        名前の区間に所要時間を加える
+        Args:
+            name(str): 区間の名前
+            seconds(float): 所要時間(秒)
+        """
+        with self._lock:
+            calls, total, max_seconds = self._spans.get(name, Span(0, 0.0, 0.0))
+            self._spans[name] = Span(calls + 1, total + seconds, max(max_seconds, seconds))
+
+    @property
+    def spans(self) -> Mapping[str, Span]:
+        """
+        Returns:
+            最初に記録された順の、区間ごとの集計(Mapping[str, Span])
+        """
+        with self._lock:
+            return dict(self._spans)
+
+    def elapsed(self) -> float:
+        """
+        Returns:
+            作られてからの経過時間(秒)(float)
+        """
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        """
+        区間ごとの集計の表
+        Returns:
+            表(str)
+        """
+        lines: list[str] = [f"{'phase':<24} {'calls':>7} {'total ms':>10} {'mean ms':>10} {'max ms':>10}"]
+        for name, span in self.spans.items():
+            lines.append(f"{name:<24} {span.calls:>7} {span.seconds * 1e3:>10.3f}"
+                         f" {span.seconds / span.calls * 1e3:>10.3f} {span.max_seconds * 1e3:>10.3f}")
+        lines.append(f"{'elapsed':<24} {'':>7} {self.elapsed() * 1e3:>10.3f}")
+        return "\n".join(lines) + "\n"
+
+    def record(self) -> dict[str, Any]:
+        """
+        JSONに書ける集計
+        Returns:
+            経過時間と区間ごとの集計(ミリ秒)(dict[str, Any])
+        """
+        return {"elapsed_ms": self.elapsed() * 1e3,
+                "spans": {name: {"calls": span.calls, "total_ms": span.seconds * 1e3,
+                                 "max_ms": span.max_seconds * 1e3}
+                          for name, span in self.spans.items()}}
@@ -0,0 +1,154 @@
+"""
+WSLEnvironmentモジュール: WSLのディストリビューション名、explorer.exeの場所、UNCホスト名の探索と、そのディスクキャッシュ
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Mapping, NamedTuple, Optional
+
+from .Exceptions import DataReadError, DataWriteError
+from .FileSideEffects import read_json, write_json
+from .MountTable import DrvfsMountTable, default_mount_table
+
+CACHE_VERSION: int = 1
+DEFAULT_DISTRIBUTION: str = "Ubuntu-20.04"
+DEFAULT_EXPLORER: Path = Path("/mnt") / "c" / "Windows" / "explorer.exe"
+EXPLORER_NAME: str = "explorer.exe"
+WSLG_DIRECTORY: Path = Path("/mnt") / "wslg"
+ENVIRONMENT_VARIABLES: tuple[str, ...] = ("WSL_DISTRO_NAME", "WINDIR", "PATH")
+
+
+class WSLEnvironment(NamedTuple):
+    """
+    WSLの環境
+    """
+    distribution: str
+    explorer: Path
+    unc_host: str
+
+
+def default_cache_file() -> Path:
+    """
+    キャッシュファイルのデフォルトの場所 ($XDG_CACHE_HOME/exp/environment.json)
+    Returns:
+        キャッシュファイル(pathlib.Path)
+    """
+    cache_home: str = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "exp" / "environment.json"
+
+
+def modification_time(path: Path) -> Optional[int]:
+    """
+    ファイルの更新時刻
+    Args:
+        path(pathlib.Path): ファイル
+    Returns:
+        更新時刻(ナノ秒)。ファイルがなければ None
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def find_explorer(mount_table: DrvfsMountTable) -> Path:
+    """
+    explorer.exeを探す。WINDIR、PATHの順に探し、なければ/mnt/c/Windows/explorer.exe。
+    Args:
+        mount_table(DrvfsMountTable): WINDIRをWSLのパスにするためのマウントテーブル
+    Returns:
+        explorer.exeのパス(pathlib.Path)
+    """
+    windows_directory: str = os.environ.get("WINDIR", "")
+    if len(windows_directory) >= 2 and windows_directory[1] == ":":
+        mount_point: str = mount_table.mount_point_of(windows_directory[:2]) or f"/mnt/{windows_directory[0].lower()}"
+        names: list[str] = [name for name in windows_directory[2:].replace("\\", "/").split("/") if name]
+        candidate: Path = Path(mount_point).joinpath(*names, EXPLORER_NAME)
+        if candidate.is_file():
+            return candidate
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if directory:
+            candidate = Path(directory) / EXPLORER_NAME
+            if candidate.is_file():
+                return candidate
+    return DEFAULT_EXPLORER
+
+
+def discover_wsl_environment(mount_table: Optional[DrvfsMountTable] = None) -> WSLEnvironment:
+    """
+    WSLの環境を探索する。PATHの探索で多数の/mnt/c配下のディレクトリを調べるので遅い。
+    Args:
+        mount_table(Optional[DrvfsMountTable], optional): マウントテーブル (default: このプロセスのもの)
+    Returns:
+        WSLの環境(WSLEnvironment)
+    """
+    return WSLEnvironment(distribution=os.environ.get("WSL_DISTRO_NAME") or DEFAULT_DISTRIBUTION,
+                          explorer=find_explorer(mount_table or default_mount_table()),
+                          unc_host="wsl.localhost" if WSLG_DIRECTORY.is_dir() else "wsl$")
+
+
+def read_cached_wsl_environment(cache_file: Path) -> Optional[WSLEnvironment]:
+    """
+    キャッシュされたWSLの環境を読む。環境変数が変わったか、explorer.exeの更新時刻が変わっていれば無効。
+    キャッシュファイルが読めない(権限がないなど)ときも無効として、探索に任せる。
+    Args:
+        cache_file(pathlib.Path): キャッシュファイル
+    Returns:
+        WSLの環境(WSLEnvironment)。キャッシュが無効なら None
+    """
+    try:
+        cached: Mapping[str, Any] = read_json(cache_file)
+    except (DataReadError, OSError, TypeError):
+        return None
+    try:
+        if cached["version"] != CACHE_VERSION \
+                or any(cached["environment_variables"].get(name) != os.environ.get(name)
+                       for name in ENVIRONMENT_VARIABLES):
+            return None
+        explorer: Path = Path(cached["explorer"])
+        if modification_time(explorer) != cached["explorer_mtime_ns"]:
+            return None
+        return WSLEnvironment(distribution=cached["distribution"], explorer=explorer, unc_host=cached["unc_host"])
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_cached_wsl_environment(environment: WSLEnvironment, cache_file: Path) -> None:
+    """
+    WSLの環境をキャッシュに書き出す
+    Args:
+        environment(WSLEnvironment): WSLの環境
+        cache_file(pathlib.Path): キャッシュファイル
+    Raises:
+        DataWriteError: 書き出し失敗
+    """
+    write_json({"version": CACHE_VERSION,
+                "environment_variables": {name: os.environ.get(name) for name in ENVIRONMENT_VARIABLES},
+                "distribution": environment.distribution,
+                "explorer": str(environment.explorer),
+                "explorer_mtime_ns": modification_time(environment.explorer),
+                "unc_host": environment.unc_host},
+               cache_file)
+
+
+def wsl_environment(cache_file: Optional[Path] = None) -> WSLEnvironment:
+    """
+    WSLの環境。有効なキャッシュがあればそれを使い、なければ探索してキャッシュに書き出す。
+    キャッシュの読み書きに失敗しても探索結果を返す。
+    Args:
+        cache_file(Optional[pathlib.Path], optional): キャッシュファイル (default: default_cache_file())
+    Returns:
+        WSLの環境(WSLEnvironment)
+    """
+    if cache_file is None:
+        cache_file = default_cache_file()
+    environment: Optional[WSLEnvironment] = read_cached_wsl_environment(cache_file)
+    if environment is not None:
+        return environment
+    environment = discover_wsl_environment()
+    try:
+        write_cached_wsl_environment(environment, cache_file)
+    except DataWriteError:
+        pass
+    return environment
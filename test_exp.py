@@ -1,12 +1,38 @@
 """
 unit test of exp.py
 """
+import asyncio
+import io
 import os
 import pathlib as p
+import stat
+import subprocess
+import sys
+import threading
+import time
+from types import MappingProxyType
 
 import pytest
 
-from exp import is_wsl2_path, wsl2_full_path2windows_path, UsageError
+import exp
+from exp import is_wsl2_path, wsl2_full_path2windows_path, wsl2_paths2windows_paths, wsl2_full_path2windows_str, \
+    wsl2_path2windows_str, cached_wsl2_full_path2windows_path, cached_is_wsl2_path, windows_path2wsl2_path, \
+    windows_paths2wsl2_paths, wsl2_path2native_windows_str, open_on_windows, \
+    resolve_path_arguments, open_paths_on_windows, group_by_parent, convert_stream, iter_separated, run_cli, \
+    async_open_on_windows, async_open_paths_on_windows, async_path_arguments2windows_strs, PathError, UsageError
+from modules.lower_layer_modules.Caches import LRUCache
+from modules.lower_layer_modules.MountTable import DrvfsMountTable
+from expc import connect_daemon, request_daemon, socket_path
+from expd import ExpDaemon
+from modules.lower_layer_modules import WSLEnvironment
+from modules.lower_layer_modules.Coalescing import LaunchCoalescer
+from modules.lower_layer_modules.Exceptions import DataReadError, DataWriteError, MultipleUseError, ProcessError, \
+    UsageError as ModuleUsageError
+from modules.lower_layer_modules.FileSideEffects import PathResolution, iter_json_items, logical_current_directory, \
+    read_json, relative_path2absolute, relative_paths2absolute
+from modules.lower_layer_modules.JSONCache import JSONFileCache
+from modules.lower_layer_modules.Launchers import CmdStartLauncher, Launcher, LaunchMode, LaunchRecord, \
+    RecordingLauncher, Spawner, WslviewLauncher
 
 
 def test_is_wsl2_path():
@@ -26,3 +52,557 @@ def test_wsl2_full_path2windows_path():
            == p.PureWindowsPath(r"C:\\")
     with pytest.raises(UsageError):
         wsl2_full_path2windows_path((p.Path("/mt") / "c"))
+
+
+def test_wsl2_paths2windows_paths():
+    wsl2_paths = (p.Path("/mnt/c/home/ykanya"), p.Path("/mt/c"), p.Path("/mnt/z/lib"), p.Path("/mnt/c"))
+    converted = wsl2_paths2windows_paths(wsl2_paths)
+    assert converted[0] == p.PureWindowsPath(r"C:\\") / "home" / "ykanya"
+    assert isinstance(converted[1], UsageError)
+    assert converted[2] == p.PureWindowsPath(r"z:\\") / "lib"
+    assert converted[3] == p.PureWindowsPath(r"C:\\")
+    assert [str(path) for path in converted if not isinstance(path, UsageError)] \
+           == [str(wsl2_full_path2windows_path(path)) for path in wsl2_paths if is_wsl2_path(path)]
+    with pytest.raises(UsageError):
+        wsl2_paths2windows_paths(wsl2_paths, strict=True)
+
+
+def test_wsl2_full_path2windows_str():
+    for wsl2_path in ("/mnt/c/home/ykanya", "/mnt/z/lib/", "/mnt/c", "/mnt/c/", "/mnt//c/./a/../b",
+                      "/mnt/cd/x", "/mnt/c/a:b", "/mnt/c/a\\b"):
+        assert wsl2_full_path2windows_str(wsl2_path) == str(wsl2_full_path2windows_path(p.Path(wsl2_path)))
+    with pytest.raises(UsageError):
+        wsl2_full_path2windows_str("/mt/c")
+
+
+def test_wsl2_path2windows_str():
+    assert wsl2_path2windows_str("/mnt/c/home/ykanya") == r"c:\home\ykanya"
+    assert wsl2_path2windows_str("/home/ykanya/", "Ubuntu-20.04") == r"\\wsl$\Ubuntu-20.04\home\ykanya"
+    assert wsl2_path2windows_str("/", "Ubuntu-20.04") == "\\\\wsl$\\Ubuntu-20.04\\"
+
+
+def test_cached_conversions():
+    cached_wsl2_full_path2windows_path.cache_clear()
+    for _ in range(3):
+        assert cached_wsl2_full_path2windows_path(p.Path("/mnt/c/home")) == p.PureWindowsPath(r"C:\\") / "home"
+    with pytest.raises(UsageError):
+        cached_wsl2_full_path2windows_path(p.Path("/mt/c"))
+    info = cached_wsl2_full_path2windows_path.cache_info()
+    assert (info.hits, info.misses, info.current_size) == (2, 2, 1)
+    assert cached_is_wsl2_path(p.Path("/mnt/c/home")) and not cached_is_wsl2_path(p.Path("/home"))
+    cached_wsl2_full_path2windows_path.cache_clear()
+    assert cached_wsl2_full_path2windows_path.cache_info().current_size == 0
+    cached = exp.cached_wsl2_path2windows_str
+    cached.cache_clear()
+    assert cached("/home/a", "Debian", unc_host="wsl.localhost") == "\\\\wsl.localhost\\Debian\\home\\a"
+    assert cached("/home/a", unc_host="wsl$", distribution="Debian") == "\\\\wsl$\\Debian\\home\\a"
+    assert cached("/home/a", distribution="Debian", unc_host="wsl$") == "\\\\wsl$\\Debian\\home\\a"
+    info = cached.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get_or_compute("a", lambda: 0) == 1
+    cache.put("c", 3)
+    assert cache.get_or_compute("b", lambda: 0) == 0
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.current_size) == (1, 1, 2, 2)
+
+
+def test_windows_path2wsl2_path():
+    assert windows_path2wsl2_path(p.PureWindowsPath(r"C:\\") / "home" / "ykanya") == p.Path("/mnt/c/home/ykanya")
+    assert windows_path2wsl2_path("z:/lib/") == p.Path("/mnt/z/lib")
+    assert windows_path2wsl2_path("C:") == p.Path("/mnt/c")
+    assert windows_path2wsl2_path(r"\\wsl$\Ubuntu-20.04\home\ykanya") == p.Path("/home/ykanya")
+    assert windows_path2wsl2_path(r"\\wsl.localhost\Ubuntu-20.04", "ubuntu-20.04") == p.Path("/")
+    for windows_path in (r"\\server\share", "C:home", r"\\wsl$\Debian\home"):
+        with pytest.raises(UsageError):
+            windows_path2wsl2_path(windows_path, "Ubuntu-20.04")
+
+
+def test_windows_paths2wsl2_paths():
+    converted = windows_paths2wsl2_paths([r"C:\\home", r"\\server\share", r"\\wsl$\Ubuntu-20.04\tmp"])
+    assert converted[0] == p.Path("/mnt/c/home")
+    assert isinstance(converted[1], UsageError)
+    assert converted[2] == p.Path("/tmp")
+    with pytest.raises(UsageError):
+        windows_paths2wsl2_paths([r"\\server\share"], strict=True)
+
+
+MOUNTINFO_SAMPLE = (
+    "63 1 8:48 / / rw,relatime - ext4 /dev/sdd rw,discard\n"
+    "86 63 0:60 / /mnt/c rw,noatime - 9p C:\\134 rw,dirsync,aname=drvfs;path=C:\\;uid=1000;gid=1000,trans=virtio\n"
+    "87 63 0:61 / /win/d rw,noatime - 9p D:\\134 rw,dirsync,aname=drvfs;path=D:\\;uid=1000;gid=1000,trans=virtio\n"
+    "88 63 0:60 /Users/ykanya/My\\040Documents /home/ykanya/docs rw,noatime - 9p C:\\134 "
+    "rw,dirsync,aname=drvfs;path=C:\\;uid=1000;gid=1000,trans=virtio\n"
+    "89 63 0:62 / /mnt/proj rw,noatime - 9p C:\\134Users\\134me\\134proj "
+    "rw,dirsync,aname=drvfs;path=C:\\Users\\me\\proj;uid=1000;gid=1000,trans=virtio\n"
+    "90 63 0:63 / /mnt/work rw,noatime - drvfs D:\\134work\\134 rw,noatime,uid=1000,gid=1000\n"
+)
+
+
+def test_wsl2_path2native_windows_str(tmp_path):
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(MOUNTINFO_SAMPLE)
+    mount_table = DrvfsMountTable(mountinfo)
+    assert wsl2_path2native_windows_str("/mnt/c/home/", mount_table=mount_table) == r"C:\home"
+    assert wsl2_path2native_windows_str("/mnt/c", mount_table=mount_table) == "C:\\"
+    assert wsl2_path2native_windows_str("/win/d/data/x.txt", mount_table=mount_table) == r"D:\data\x.txt"
+    assert wsl2_path2native_windows_str("/home/ykanya/docs/a", mount_table=mount_table) \
+           == r"C:\Users\ykanya\My Documents\a"
+    assert wsl2_path2native_windows_str("/home/ykanya/docs2", "Ubuntu-20.04", mount_table) \
+           == r"\\wsl$\Ubuntu-20.04\home\ykanya\docs2"
+    assert wsl2_path2native_windows_str("/mnt/z/lib", mount_table=mount_table) == r"z:\lib"
+    assert wsl2_path2native_windows_str("/mnt/proj/src", mount_table=mount_table) == r"C:\Users\me\proj\src"
+    assert wsl2_path2native_windows_str("/mnt/proj", mount_table=mount_table) == r"C:\Users\me\proj"
+    assert wsl2_path2native_windows_str("/mnt/work/a", mount_table=mount_table) == r"D:\work\a"
+
+
+def test_wsl_environment_cache(tmp_path, monkeypatch):
+    explorer = tmp_path / "Windows" / "explorer.exe"
+    explorer.parent.mkdir()
+    explorer.write_text("")
+    cache_file = tmp_path / "cache" / "environment.json"
+    monkeypatch.setenv("WSL_DISTRO_NAME", "Debian")
+    monkeypatch.setenv("PATH", str(explorer.parent))
+    monkeypatch.delenv("WINDIR", raising=False)
+    environment = WSLEnvironment.wsl_environment(cache_file)
+    assert (environment.distribution, environment.explorer) == ("Debian", explorer)
+    assert WSLEnvironment.read_cached_wsl_environment(cache_file) == environment
+
+    def no_discovery(*_):
+        raise AssertionError("discovery on a warm cache")
+
+    monkeypatch.setattr(WSLEnvironment, "discover_wsl_environment", no_discovery)
+    assert WSLEnvironment.wsl_environment(cache_file) == environment
+    os.utime(explorer, ns=(0, 0))
+    assert WSLEnvironment.read_cached_wsl_environment(cache_file) is None
+    monkeypatch.setenv("WSL_DISTRO_NAME", "Ubuntu")
+    assert WSLEnvironment.read_cached_wsl_environment(cache_file) is None
+
+    def unreadable(*_):
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(WSLEnvironment, "read_json", unreadable)
+    assert WSLEnvironment.read_cached_wsl_environment(cache_file) is None
+    monkeypatch.setattr(WSLEnvironment, "discover_wsl_environment", lambda *_: environment)
+    assert WSLEnvironment.wsl_environment(cache_file) == environment
+
+
+def stand_in_explorer(directory: p.Path, delay: float = 0.0) -> p.Path:
+    explorer = directory / "explorer.sh"
+    explorer.write_text(f"#!/bin/sh\nsleep {delay}\nprintf '%s\\n' \"$@\" >> {directory / 'opened.txt'}\n")
+    explorer.chmod(0o755)
+    return explorer
+
+
+@pytest.mark.parametrize("spawner", list(Spawner))
+def test_open_on_windows_modes(tmp_path, spawner):
+    explorer = stand_in_explorer(tmp_path, delay=0.5)
+    open_on_windows(explorer, p.Path("/home/ykanya"), distribution="Ubuntu-20.04", mode=LaunchMode.WAIT,
+                    spawner=spawner)
+    assert (tmp_path / "opened.txt").read_text() == "\\\\wsl$\\Ubuntu-20.04\\home\\ykanya\n"
+    started = time.monotonic()
+    open_on_windows(explorer, p.Path("/home"), distribution="Ubuntu-20.04", mode=LaunchMode.DETACH, spawner=spawner)
+    assert time.monotonic() - started < 0.5
+    for mode in LaunchMode:
+        with pytest.raises(ProcessError):
+            open_on_windows(tmp_path / "missing.exe", p.Path("/home"), mode=mode, spawner=spawner)
+
+
+def test_resolve_path_arguments(tmp_path, monkeypatch):
+    for name in ("a.txt", "b.txt", "c.log"):
+        (tmp_path / name).write_text("")
+    resolved = resolve_path_arguments(["*.txt", "a.txt", "./c.log", "none*"], tmp_path, jobs=2)
+    assert resolved == (tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.log", tmp_path / "none*")
+
+    def no_listing(*_):
+        raise AssertionError("a directory listed for a single path")
+
+    monkeypatch.setattr(os, "scandir", no_listing)
+    assert resolve_path_arguments(["a.txt"], tmp_path) == (tmp_path / "a.txt",)
+
+
+def test_path_resolutions(tmp_path, monkeypatch):
+    (tmp_path / "real" / "sub").mkdir(parents=True)
+    (tmp_path / "link").symlink_to(tmp_path / "real" / "sub")
+    expected = {PathResolution.RESOLVE: tmp_path / "real" / "x", PathResolution.LINKS: tmp_path / "real" / "x",
+                PathResolution.LEXICAL: tmp_path / "x"}
+    for resolution, path in expected.items():
+        assert relative_path2absolute(p.Path("link/../x"), tmp_path, resolution=resolution) == path
+        assert relative_path2absolute(p.Path("./a/./b/../c"), tmp_path, resolution=resolution) == tmp_path / "a/c"
+    assert relative_path2absolute(p.Path("link"), tmp_path, resolution=PathResolution.LINKS) \
+           == tmp_path / "real" / "sub"
+    assert relative_path2absolute(p.Path("link"), tmp_path, resolution=PathResolution.LINKS,
+                                  link_free_prefixes=[str(tmp_path)]) == tmp_path / "link"
+    recorder = RecordingLauncher()
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=tmp_path / "explorer.exe",
+                                                unc_host="wsl$")
+    assert exp.parse_arguments(["link/../x"]).resolution == exp.parse_arguments(["--select", "x"]).resolution \
+           == PathResolution.RESOLVE.value
+    assert run_cli(["link/../x"], tmp_path, environment, io.StringIO(), launcher=recorder) == 0
+    assert recorder.records[0].windows_path == f"\\\\wsl$\\Debian{tmp_path / 'real' / 'x'}".replace("/", "\\")
+    monkeypatch.chdir(tmp_path / "link")
+    monkeypatch.setenv("PWD", str(tmp_path / "link"))
+    assert logical_current_directory() == tmp_path / "link"
+    monkeypatch.setenv("PWD", str(tmp_path))
+    assert logical_current_directory() == tmp_path / "real" / "sub"
+
+
+def test_relative_paths2absolute(tmp_path, monkeypatch):
+    for index in range(3):
+        (tmp_path / "real" / f"d{index}").mkdir(parents=True)
+    (tmp_path / "link").symlink_to(tmp_path / "real")
+    paths = [p.Path(f"link/d{index % 3}/../d{index % 3}/file{index}.txt") for index in range(300)]
+    scans = []
+    original_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or original_scandir(path))
+    listings = {}
+    for resolution in PathResolution:
+        assert relative_paths2absolute(paths, tmp_path, resolution=resolution, listings=listings) \
+               == tuple(relative_path2absolute(path, tmp_path, resolution=resolution) for path in paths)
+    assert len(scans) == len(set(scans)) == len(listings) == 4 + len(tmp_path.parts)
+    relative_paths2absolute(paths, tmp_path, listings=listings)
+    assert len(scans) == len(listings)
+    (tmp_path / "real" / "d0").rmdir()
+    (tmp_path / "real" / "d0").symlink_to(tmp_path / "real" / "d1")
+    assert relative_paths2absolute(paths[:1], tmp_path, listings=listings) == (tmp_path / "real" / "d1" / "file0.txt",)
+
+
+def test_convert_stream():
+    paths = b"/mnt/c/a b\0rel/x\0\0/mnt/Z/bad\0/home/y"
+    assert [record for records in iter_separated(io.BytesIO(paths), b"\0", chunk_size=3) for record in records] \
+           == paths.split(b"\0")
+    output, errors = io.BytesIO(), io.StringIO()
+    assert convert_stream(io.BufferedReader(io.BytesIO(paths), buffer_size=4), output, errors, separator=b"\0",
+                          current_directory=p.Path("/home/a"), distribution="Debian") == 1
+    assert output.getvalue().split(b"\0") \
+           == [b"c:\\a b", b"\\\\wsl$\\Debian\\home\\a\\rel\\x", b"\\\\wsl$\\Debian\\home\\y", b""]
+    assert errors.getvalue().startswith("/mnt/Z/bad: ")
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=p.Path("explorer.exe"), unc_host="wsl$")
+    output = io.BytesIO()
+    assert run_cli(["--convert"], p.Path("/"), environment, io.StringIO(), io.BytesIO(b"/mnt/d/x\n"), output) == 0
+    assert output.getvalue() == b"d:\\x\n"
+    errors = io.StringIO()
+    assert run_cli(["--convert", "/mnt/c"], p.Path("/"), environment, errors) == 2 and "--convert" in errors.getvalue()
+
+
+def test_iter_json_items(tmp_path):
+    json_file = tmp_path / "items.json"
+    json_file.write_text('{"meta": {"version": 3, "note": "[{\\"}"}, "items": ['
+                         + ", ".join(f'{{"id": {index}, "name": "名前{index}", "tags": [{index}]}}' for index in range(100))
+                         + "]}", encoding="utf-8")
+    for chunk_size in (1, 7, 65536):
+        assert list(iter_json_items(json_file, "items[*].id", chunk_size=chunk_size)) == list(range(100))
+        assert list(iter_json_items(json_file, "meta.version", chunk_size=chunk_size)) == [3]
+        assert [item["name"] for item in iter_json_items(json_file, "items[*]", chunk_size=chunk_size)] \
+               == [f"名前{index}" for index in range(100)]
+    assert list(iter_json_items(json_file, "missing[*]")) == []
+    with pytest.raises(ModuleUsageError):
+        list(iter_json_items(json_file, "items[*"))
+    json_file.write_text('["é", {"a": [1, tru]}]', encoding="utf-8")
+    with pytest.raises(DataReadError, match="at byte 17"):
+        list(iter_json_items(json_file, chunk_size=4))
+    json_file.write_text('[1, 2', encoding="utf-8")
+    with pytest.raises(DataReadError, match="at byte 5"):
+        list(iter_json_items(json_file))
+    # the grammar is checked on the selected values only, not inside the skipped subtrees
+    json_file.write_text('{"skipped": [{"id": 1 "b": 2}, tru,, 3], "items": [{"id": 1}]}', encoding="utf-8")
+    assert list(iter_json_items(json_file, "items[*].id")) == [1]
+    assert dict(read_json(json_file, select=["items"])) == {"items": [{"id": 1}]}
+    for prefix in ("skipped", "skipped[*]", "skipped[*].id"):
+        with pytest.raises(DataReadError):
+            list(iter_json_items(json_file, prefix))
+
+
+def test_read_json_select(tmp_path):
+    json_file = tmp_path / "document.json"
+    json_file.write_text('{"meta": {"version": 3, "tags": ["a", {"b": "}"}]}, "items": [{"id": 1, "body": [[{}]]},'
+                         ' {"body": "x"}, 5, {"id": 2, "id2": 0}], "rest": {"meta": {"version": 4}}}', encoding="utf-8")
+    selected = read_json(json_file, select=["meta.version", "items[*].id", "missing.key"])
+    assert dict(selected) == {"meta": {"version": 3}, "items": [{"id": 1}, {}, {"id": 2}]}
+    assert dict(read_json(json_file, select=["meta", "meta.version"]))["meta"] == read_json(json_file)["meta"]
+    json_file.write_text("[1]", encoding="utf-8")
+    with pytest.raises(DataReadError):
+        read_json(json_file, select=["meta.version"])
+
+
+def test_read_json_frozen(tmp_path):
+    json_file = tmp_path / "document.json"
+    json_file.write_text('{"meta": {"tags": ["a", [1, {"b": []}]]}, "items": [{"id": 1}], "n": null}', encoding="utf-8")
+    frozen = read_json(json_file, frozen=True)
+    assert frozen == read_json(json_file) | {"meta": {"tags": ("a", (1, {"b": ()}))}, "items": ({"id": 1},)}
+    assert isinstance(frozen["meta"]["tags"][1], tuple) and isinstance(frozen["items"][0], MappingProxyType)
+    with pytest.raises(TypeError):
+        frozen["items"][0]["id"] = 2
+    with pytest.raises(AttributeError):
+        frozen["meta"]["tags"].append("c")
+    selected = read_json(json_file, select=["items[*].id"], frozen=True)
+    assert selected == {"items": ({"id": 1},)} and isinstance(selected["items"], tuple)
+    json_file.write_text("[1, ", encoding="utf-8")
+    with pytest.raises(DataReadError):
+        read_json(json_file, frozen=True)
+
+
+def test_read_json_compact(tmp_path):
+    json_file = tmp_path / "records.json"
+    json_file.write_text('{"items": [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": []}, {"tags": [[]], "id": 3},'
+                         ' {"id": 4, "tags": [], "id": 5}, {"id": 6, "tags": [], "id": 7}, {}], "n": 0}',
+                         encoding="utf-8")
+    compact = read_json(json_file, compact=True)
+    items = compact["items"]
+    assert compact == {"items": ({"id": 1, "tags": ("a",)}, {"id": 2, "tags": ()}, {"id": 3, "tags": ((),)},
+                                 {"id": 5, "tags": ()}, {"id": 7, "tags": ()}, {}), "n": 0}
+    assert [type(item).__name__ for item in items] \
+           == ["mappingproxy", "CompactRecord", "mappingproxy", "mappingproxy", "CompactRecord", "mappingproxy"]
+    assert items[1]["id"] == 2 and items[1].get("missing") is None and "tags" in items[1]
+    assert list(items[4]) == ["id", "tags"] and len(items[4]) == 2 and dict(items[4]) == {"id": 7, "tags": ()}
+    with pytest.raises(KeyError):
+        items[1]["missing"]
+    with pytest.raises(TypeError):
+        items[1]["id"] = 0
+    for mutate in (lambda: setattr(items[1], "_values", (0, ())), lambda: delattr(items[1], "_values"),
+                   lambda: setattr(items[1], "extra", 0)):
+        with pytest.raises(AttributeError):
+            mutate()
+    assert dict(items[1]) == {"id": 2, "tags": ()}
+    selected = read_json(json_file, select=["items[*].id"], compact=True)
+    assert selected == {"items": ({"id": 1}, {"id": 2}, {"id": 3}, {"id": 5}, {"id": 7}, {})}
+    assert type(selected["items"][1]).__name__ == "CompactRecord"
+
+
+def test_json_file_cache(tmp_path):
+    cache = JSONFileCache(max_entries=2)
+    json_file = tmp_path / "config.json"
+    json_file.write_text('{"items": [{"id": 1}], "name": "a"}', encoding="utf-8")
+    first = cache.read(json_file)
+    assert cache.read(tmp_path / "." / "config.json") is first
+    assert first["items"][0]["id"] == 1 and isinstance(first["items"], tuple)
+    with pytest.raises(TypeError):
+        first["items"][0]["id"] = 2
+    assert dict(cache.read(json_file, select=["name"])) == {"name": "a"}
+    json_file.write_text('{"items": [], "name": "bb"}', encoding="utf-8")
+    assert cache.read(json_file)["name"] == "bb"
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.current_size) == (1, 3, 0, 2) and info.current_weight > 0
+    assert cache.invalidate(json_file) == 2 and cache.cache_info().current_size == 0
+    for index in range(3):
+        (tmp_path / f"{index}.json").write_text(f'{{"index": {index}}}', encoding="utf-8")
+        cache.read(tmp_path / f"{index}.json")
+    assert cache.cache_info().evictions == 1
+    small = JSONFileCache(max_bytes=100)
+    small.read(json_file)
+    assert small.cache_info().current_size == 0
+    with pytest.raises(DataReadError):
+        cache.read(tmp_path / "missing.json")
+
+
+def test_open_paths_on_windows(tmp_path):
+    explorer = stand_in_explorer(tmp_path)
+    paths = [p.Path("/home/a"), p.Path("/mnt/z/b"), p.Path("/mnt/Z/c")]
+    failures = open_paths_on_windows(explorer, paths, jobs=2, distribution="Ubuntu-20.04")
+    assert [failure.path for failure in failures] == [p.Path("/mnt/Z/c")]
+    assert isinstance(failures[0], PathError) and isinstance(failures[0].error, UsageError)
+    assert sorted((tmp_path / "opened.txt").read_text().splitlines()) \
+           == sorted(["\\\\wsl$\\Ubuntu-20.04\\home\\a", "z:\\b"])
+
+
+def test_async_open_on_windows(tmp_path):
+    explorer = stand_in_explorer(tmp_path, delay=0.3)
+
+    async def open_all():
+        started = time.monotonic()
+        failures = await async_open_paths_on_windows(
+            explorer, [p.Path(f"/mnt/c/{index}") for index in range(4)] + [p.Path("/mnt/Z/c")], jobs=2)
+        assert 0.6 <= time.monotonic() - started < 1.5
+        assert [failure.path for failure in failures] == [p.Path("/mnt/Z/c")]
+        with pytest.raises(ProcessError):
+            await async_open_on_windows(stand_in_explorer(tmp_path, delay=5), p.Path("/mnt/c/x"), timeout=0.2)
+        task = asyncio.create_task(async_open_on_windows(explorer, p.Path("/mnt/c/y")))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.1):
+                await async_open_paths_on_windows(explorer, [p.Path("/mnt/c/z")])
+        assert asyncio.current_task().cancelling() == 0
+        (tmp_path / "a.txt").write_text("")
+        return await async_path_arguments2windows_strs(["a.txt", "/mnt/Z/c"], tmp_path, distribution="Debian")
+
+    converted = asyncio.run(open_all())
+    assert converted[0] == f"\\\\wsl$\\Debian{tmp_path / 'a.txt'}".replace("/", "\\")
+    assert isinstance(converted[1], PathError)
+    assert sorted((tmp_path / "opened.txt").read_text().splitlines()) == [f"c:\\{index}" for index in range(4)]
+
+
+def test_launchers(tmp_path):
+    class IncompleteLauncher(Launcher):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteLauncher()
+    recorder = RecordingLauncher()
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=tmp_path / "missing.exe",
+                                                unc_host="wsl$")
+    assert run_cli(["--select", "/mnt/c/a/1", "/mnt/c/a/2", "/home"], tmp_path, environment, io.StringIO(),
+                   launcher=recorder) == 0
+    assert recorder.records == [LaunchRecord("c:\\a\\1", True, LaunchMode.WAIT),
+                                LaunchRecord("\\\\wsl$\\Debian\\home", True, LaunchMode.WAIT)]
+    script = stand_in_explorer(tmp_path)
+    open_on_windows(tmp_path, p.Path("/mnt/c/x/y"), select=True, launcher=WslviewLauncher(script))
+    open_on_windows(tmp_path, p.Path("/mnt/c/x/y"), select=True, launcher=CmdStartLauncher(script))
+    open_on_windows(tmp_path, p.Path("/mnt/c/x y"), launcher=CmdStartLauncher(script))
+    assert (tmp_path / "opened.txt").read_text().splitlines() \
+           == ["c:\\x", "/c", "start", '""', "explorer.exe", "/select,c:\\x\\y", "/c", "start", '""', "c:\\x y"]
+    with pytest.raises(ModuleUsageError):
+        CmdStartLauncher(script).command("c:\\a&b")
+
+
+def test_profile(tmp_path):
+    import json
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=tmp_path / "missing.exe",
+                                                unc_host="wsl$")
+    stderr = io.StringIO()
+    telemetry = tmp_path / "state" / "telemetry.jsonl"
+    argv = ["--profile-output", str(tmp_path / "exp.prof"), "--telemetry", str(telemetry), "/mnt/c/a", "/home"]
+    for _ in range(2):
+        assert run_cli(argv, tmp_path, environment, stderr, launcher=RecordingLauncher()) == 0
+    for phase in ("relative_path2absolute", "resolution", "conversion", "launch", "open", "run", "elapsed"):
+        assert phase in stderr.getvalue()
+    records = [json.loads(line) for line in telemetry.read_text().splitlines()]
+    assert len(records) == 2 and records[0]["argv"] == argv and records[0]["status"] == 0
+    assert records[0]["spans"]["conversion"]["calls"] == 2 and records[0]["spans"]["run"]["calls"] == 1
+    assert (tmp_path / "exp.prof").stat().st_size > 0
+    stderr = io.StringIO()
+    assert run_cli(["/mnt/c/a"], tmp_path, environment, stderr, launcher=RecordingLauncher()) == 0
+    assert stderr.getvalue() == ""
+
+
+def test_select_by_parent(tmp_path):
+    explorer = stand_in_explorer(tmp_path)
+    paths = [p.Path("/mnt/c/logs") / f"{index}.txt" for index in range(100)] + [p.Path("/mnt/d/x.txt")]
+    groups = group_by_parent(paths)
+    assert list(groups) == [p.Path("/mnt/c/logs"), p.Path("/mnt/d")]
+    assert not open_paths_on_windows(explorer, [group[0] for group in groups.values()], select=True)
+    assert sorted((tmp_path / "opened.txt").read_text().splitlines()) \
+           == ["/select,c:\\logs\\0.txt", "/select,d:\\x.txt"]
+
+
+def test_coalesced_open(tmp_path):
+    explorer = stand_in_explorer(tmp_path)
+    coalescer = LaunchCoalescer(60.0, tmp_path / "state" / "launches.json")
+    open_on_windows(explorer, p.Path("/mnt/c/out"), coalescer=coalescer)
+    with pytest.raises(MultipleUseError):
+        open_on_windows(explorer, p.Path("/mnt/c/out/"), coalescer=LaunchCoalescer(60.0, coalescer.state_file))
+    open_on_windows(explorer, p.Path("/mnt/c/out"), coalescer=coalescer, select=True)
+    assert (tmp_path / "opened.txt").read_text().splitlines() == ["c:\\out", "/select,c:\\out"]
+    failures = open_paths_on_windows(explorer, [p.Path("/mnt/c/out")] * 3, coalescer=coalescer)
+    assert len(failures) == 3 and all(isinstance(failure.error, MultipleUseError) for failure in failures)
+    with pytest.raises(ProcessError):
+        open_on_windows(tmp_path / "missing.exe", p.Path("/mnt/c/retried"), coalescer=coalescer)
+    open_on_windows(explorer, p.Path("/mnt/c/retried"), coalescer=coalescer)
+    assert (tmp_path / "opened.txt").read_text().splitlines()[-1] == "c:\\retried"
+    claimed = coalescer.claim("later")
+    coalescer.release("later", claimed - 1.0)
+    with pytest.raises(MultipleUseError):
+        coalescer.claim("later")
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+    (tmp_path / "planted").symlink_to(coalescer.state_file.parent)
+    (coalescer.state_file.parent / "linked.json").symlink_to(coalescer.state_file)
+    for state_file in [shared / "launches.json", tmp_path / "planted" / "launches.json",
+                       coalescer.state_file.parent / "linked.json"]:
+        with pytest.raises(DataWriteError):
+            LaunchCoalescer(60.0, state_file).claim("x")
+    assert coalescer.state_file.parent.stat().st_mode & 0o777 == 0o700
+
+
+def test_daemon(tmp_path, monkeypatch):
+    explorer = stand_in_explorer(tmp_path)
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=explorer, unc_host="wsl.localhost")
+    socket = tmp_path / "run" / "exp.sock"
+    with ExpDaemon(socket, environment) as daemon:
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            with pytest.raises(MultipleUseError):
+                ExpDaemon(socket, environment)
+            assert request_daemon(connect_daemon(str(socket)), ["b", "/mnt/c/x"], "/home/a") == (0, "")
+            status, message = request_daemon(connect_daemon(str(socket)), ["--jobs", "0"], "/home/a")
+            assert status == 2 and "--jobs" in message
+            status, _ = request_daemon(connect_daemon(str(socket)), ["--telemetry=t.jsonl", "--profile", "/home/a"],
+                                       str(tmp_path))
+            assert status == 0 and (tmp_path / "t.jsonl").exists()
+
+            def failing_run_cli(*_):
+                raise RuntimeError("broken")
+
+            monkeypatch.setattr(exp, "run_cli", failing_run_cli)
+            status, message = request_daemon(connect_daemon(str(socket)), ["/home/a"], "/home/a")
+            assert status == 1 and "broken" in message
+        finally:
+            daemon.shutdown()
+            thread.join()
+    assert not socket.exists()
+    assert sorted((tmp_path / "opened.txt").read_text().splitlines()) \
+           == ["\\\\wsl.localhost\\Debian\\home\\a", "\\\\wsl.localhost\\Debian\\home\\a\\b", "c:\\x"]
+
+
+def test_daemon_and_coalesce_share_runtime_directory(tmp_path, monkeypatch):
+    explorer = stand_in_explorer(tmp_path)
+    environment = WSLEnvironment.WSLEnvironment(distribution="Debian", explorer=explorer, unc_host="wsl.localhost")
+    monkeypatch.delenv("EXP_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    socket = p.Path(socket_path())
+    with ExpDaemon(socket, environment) as daemon:
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            assert stat.S_IMODE(socket.parent.stat().st_mode) == 0o700
+            assert request_daemon(connect_daemon(str(socket)), ["--coalesce", "5", "/mnt/c/x"], "/home/a") == (0, "")
+            assert (tmp_path / "run" / "exp" / "launches.json").exists()
+            with monkeypatch.context() as context:
+                context.setattr(os, "getuid", lambda: os.geteuid() + 1)
+                with pytest.raises(PermissionError):
+                    connect_daemon(str(socket))
+        finally:
+            daemon.shutdown()
+            thread.join()
+    assert (tmp_path / "opened.txt").read_text().splitlines() == ["c:\\x"]
+
+
+STARTUP_MODULE_BUDGET = 75
+STARTUP_IMPORT_BUDGET_US = 70000
+
+
+def imported_modules(arguments, environment):
+    """the self import times in microseconds of the modules imported by python -X importtime <arguments>"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", *arguments], env=environment,
+                               cwd=p.Path(__file__).parent, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:"):
+            self_time, _, name = line.removeprefix("import time:").split("|")
+            if self_time.strip().isdigit():
+                times[name.strip()] = times.get(name.strip(), 0) + int(self_time)
+    return times
+
+
+def test_startup_import_budget(tmp_path):
+    (tmp_path / "bin").mkdir()
+    stand_in_explorer(tmp_path).rename(tmp_path / "bin" / "explorer.exe")
+    environment = dict(os.environ, PATH=f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}",
+                       XDG_CACHE_HOME=str(tmp_path / "cache"), XDG_RUNTIME_DIR=str(tmp_path / "run"))
+    interpreter = imported_modules(["-c", "pass"], environment)
+    imported_modules(["exp.py", str(tmp_path)], environment)
+    runs = [{name: time_us for name, time_us in imported_modules(["exp.py", str(tmp_path)], environment).items()
+             if name not in interpreter} for _ in range(3)]
+    assert (tmp_path / "opened.txt").read_text().count("\n") == 4
+    assert "argparse" not in runs[0] and "concurrent.futures" not in runs[0]
+    assert len(runs[0]) <= STARTUP_MODULE_BUDGET, sorted(runs[0])
+    assert min(sum(run.values()) for run in runs) <= STARTUP_IMPORT_BUDGET_US